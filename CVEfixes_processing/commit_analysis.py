@@ -0,0 +1,368 @@
+import argparse
+import json
+import os
+import subprocess
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from repo_mirror_cache import RepoMirrorCache, MirrorUnavailable, parse_size
+
+# constants to access elements in the repos_fixes list
+COMMIT_ID_INDEX = 1
+REPO_URL_INDEX = 2
+
+# Output folder per version of the changed files
+OUTPUT_DIRS = {
+    "fix": "repos_patched_analysis",
+    "vulnerable": "repos_vulnerability_analysis",
+}
+
+
+def git(repo_path, *args, check=True, env=None):
+    return subprocess.run(["git", "-C", repo_path, *args], check=check, capture_output=True, text=True, env=env)
+
+
+def has_commit(repo_path, commit_id):
+    return git(repo_path, "cat-file", "-e", f"{commit_id}^{{commit}}", check=False).returncode == 0
+
+
+def ensure_commit(repo_path, commit_id):
+    """Fetch a commit from origin unless the clone already has it."""
+    if not has_commit(repo_path, commit_id):
+        git(repo_path, "fetch", "origin", commit_id)
+
+
+def ensure_commits(repo_path, commit_ids):
+    """
+    Fetch all missing commits with one git fetch before the commits are analyzed concurrently
+    (parallel fetches into one repository race on FETCH_HEAD). Falls back to one fetch per
+    commit if the batch fails, so a single unknown commit does not block the others.
+    """
+    missing = [commit_id for commit_id in commit_ids if not has_commit(repo_path, commit_id)]
+    if not missing:
+        return
+    if git(repo_path, "fetch", "origin", *missing, check=False).returncode != 0:
+        for commit_id in missing:
+            git(repo_path, "fetch", "origin", commit_id, check=False)
+
+
+class GitObjectReader:
+    """
+    Read file contents straight from a repository's object database.
+
+    Keeps one `git cat-file --batch` process open, so reading `<commit>:<path>` or
+    `<commit>^:<path>` costs a pipe round trip instead of a checkout, and the working
+    tree is never touched. Safe to share between threads. `env` is used for the
+    reader's own git process and for the analysis' git commands on the same repository.
+
+    Examples:
+        >>> with GitObjectReader("repos/owner/name") as reader:
+        ...     fixed = reader.read(commit_id, "app/views.py")
+        ...     vulnerable = reader.read(f"{commit_id}^", "app/views.py")
+    """
+
+    def __init__(self, repo_path, env=None):
+        self.repo_path = repo_path
+        self.env = env
+        self.lock = threading.Lock()
+        self.process = subprocess.Popen(
+            ["git", "-C", repo_path, "cat-file", "--batch"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, env=env
+        )
+
+    def read(self, revision, path):
+        """Return the bytes of `path` at `revision`, or None if it does not exist there."""
+        with self.lock:
+            self.process.stdin.write(f"{revision}:{path}\n".encode("utf-8"))
+            self.process.stdin.flush()
+            header = self.process.stdout.readline().decode("utf-8").rstrip("\n")
+            # "<object> missing" / "<object> ambiguous" instead of "<sha> <type> <size>"
+            if header.endswith((" missing", " ambiguous")):
+                return None
+            _, object_type, size = header.rsplit(" ", 2)
+            content = self.process.stdout.read(int(size))
+            self.process.stdout.read(1)  # trailing newline
+        return content if object_type == "blob" else None
+
+    def close(self):
+        if self.process.poll() is None:
+            self.process.stdin.close()
+            self.process.wait()
+        self.process.stdout.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def analyze_commit_changes(repo_path, commit_id, env=None):
+    """
+    Analyze changes made in a specific commit compared to its parent.
+
+    Unlike the notebook version this does not check the commit out; the diff is read
+    straight from the object store so several commits can be analyzed at the same time.
+    The commit must already be in the repository (see ensure_commits): fetching here
+    would run several git fetches into one repository at once.
+
+    :param repo_path: Path to the local git repository
+    :param commit_id: Commit ID to analyze
+    :param env: Environment for the git commands (None: inherit the current one)
+    :return: Dictionary containing detailed information about the changes
+    """
+    try:
+        # Get list of files changed
+        files_changed = git(
+            repo_path, "diff-tree", "--no-commit-id", "--name-only", "-r", commit_id, env=env
+        ).stdout.strip().split("\n")
+
+        # Get stats summary
+        stats_summary = git(repo_path, "diff", "--stat", f"{commit_id}^", commit_id, env=env).stdout.strip()
+
+        # Get detailed diff
+        diff_output = git(repo_path, "diff", f"{commit_id}^", commit_id, env=env).stdout
+
+        # Parse diff to count additions and deletions by file
+        file_stats = defaultdict(lambda: {"additions": 0, "deletions": 0, "changes": 0})
+        current_file = None
+
+        for line in diff_output.split("\n"):
+            if line.startswith("diff --git"):
+                # Extract the file name from the diff header
+                current_file = line.split(" b/")[-1]
+            elif line.startswith("+") and not line.startswith("+++"):
+                file_stats[current_file]["additions"] += 1
+                file_stats[current_file]["changes"] += 1
+            elif line.startswith("-") and not line.startswith("---"):
+                file_stats[current_file]["deletions"] += 1
+                file_stats[current_file]["changes"] += 1
+
+        return {
+            "files": dict(file_stats),
+            "files_list": files_changed,
+            "diff_summary": stats_summary,
+            "full_diff": diff_output,
+        }
+
+    except subprocess.CalledProcessError as e:
+        print(f"Git command error: {e}")
+        return {"error": str(e), "stdout": e.stdout, "stderr": e.stderr}
+    except Exception as e:
+        print(f"An unexpected error occurred: {e}")
+        return {"error": str(e)}
+
+
+def clone_repo(repo_url, repo_path):
+    """Clone a repository once; later commits of the same repository reuse the clone."""
+    if os.path.isdir(os.path.join(repo_path, ".git")):
+        return True
+    os.makedirs(os.path.dirname(os.path.abspath(repo_path)), exist_ok=True)
+    try:
+        print(f"Cloning repository from {repo_url} to {repo_path}...")
+        # Files are read from the object database, so no working tree is needed
+        subprocess.run(["git", "clone", "--quiet", "--no-checkout", repo_url, repo_path],
+                       check=True, capture_output=True)
+        print("Repository cloned successfully.")
+        return True
+    except subprocess.CalledProcessError as e:
+        print(f"An error occurred while running git command: {e}")
+        return False
+
+
+def postprocessing(analysis, repo_name, reader, revision, commit_id, base_dir):
+    """
+    Save the changed Python files of a commit as they are at `revision`.
+
+    :param analysis: Analysis results dictionary
+    :param repo_name: Name of the repository
+    :param reader: GitObjectReader of the repository
+    :param revision: commit_id for the fixed files, commit_id^ for the vulnerable ones
+    :param commit_id: Commit ID being analyzed
+    :param base_dir: repos_patched_analysis or repos_vulnerability_analysis
+    """
+    files_dir = os.path.join(base_dir, repo_name, commit_id[:7], "files")
+    os.makedirs(files_dir, exist_ok=True)
+
+    for file_path in analysis['files_list']:
+        if ".py" not in file_path:
+            continue
+        content = reader.read(revision, file_path)
+        if content is None:
+            print(f"File not found: {revision}:{file_path}")
+            continue
+
+        # Create a filename based on the original file's basename
+        with open(os.path.join(files_dir, os.path.basename(file_path)), 'wb') as f:
+            f.write(content)
+
+
+def analyze_commit(reader, repo_name, commit_id, versions):
+    """Analyze one commit and save its changed Python files for each requested version."""
+    analysis = analyze_commit_changes(reader.repo_path, commit_id, reader.env)
+    # There should be no error in the analysis
+    if "error" in analysis:
+        return f"error: {analysis['error']}"
+    if not any(".py" in file_path for file_path in analysis['files_list']):
+        return "no_python_files"
+    for version in versions:
+        revision = commit_id if version == "fix" else f"{commit_id}^"
+        postprocessing(analysis, repo_name, reader, revision, commit_id, OUTPUT_DIRS[version])
+    return "processed"
+
+
+def analyze_repository(repo_url, commit_ids, versions=("fix",), repo_playground=".", commit_workers=4,
+                       mirror=None):
+    """
+    Analyze every fix commit of one repository in a single clone.
+
+    Runs in a worker process. Files are read from the object database rather than
+    checked out, so up to `commit_workers` commits of the repository are analyzed at once.
+
+    :param repo_url: Repository URL, e.g. https://github.com/owner/name
+    :param commit_ids: Fix commits of this repository
+    :param versions: Which versions of the changed files to save: "fix" and/or "vulnerable"
+    :param repo_playground: Folder where the repositories are cloned
+    :param commit_workers: Commits of this repository analyzed concurrently
+    :param mirror: Optional RepoMirrorCache used instead of a clone in repo_playground
+    :return: Dictionary of commit ID -> "processed", "no_python_files" or an error message
+    """
+    repo_owner, repo_name = repo_url.rstrip("/").split("/")[-2:]
+    # Commits missing from the mirror are reported first; keep the input order in the result
+    order = list(commit_ids)
+    results = {}
+    env = None
+    if mirror is not None:
+        try:
+            repo_path = mirror.ensure(repo_url)
+            missing = mirror.ensure_commits(repo_path, commit_ids)
+        except (MirrorUnavailable, subprocess.CalledProcessError) as e:
+            return {commit_id: f"mirror unavailable: {e}" for commit_id in commit_ids}
+        # Offline, keeps the analysis' own git calls (and lazy blob fetches) off the network
+        env = mirror.git_env()
+        results.update((commit_id, "error: commit not in mirror") for commit_id in missing)
+        commit_ids = [commit_id for commit_id in commit_ids if commit_id not in results]
+    else:
+        repo_path = os.path.join(repo_playground, repo_owner, repo_name)
+        if not clone_repo(repo_url, repo_path):
+            return {commit_id: "clone failed" for commit_id in commit_ids}
+        ensure_commits(repo_path, commit_ids)
+
+    with GitObjectReader(repo_path, env) as reader, ThreadPoolExecutor(max_workers=commit_workers) as executor:
+        statuses = executor.map(lambda commit_id: analyze_commit(reader, repo_name, commit_id, versions), commit_ids)
+        results.update(zip(commit_ids, statuses))
+        if mirror is None:
+            # Commits the batch fetch missed are fetched one at a time, outside the thread pool
+            for commit_id in commit_ids:
+                if results[commit_id].startswith("error") and not has_commit(repo_path, commit_id):
+                    try:
+                        ensure_commit(repo_path, commit_id)
+                    except subprocess.CalledProcessError as e:
+                        results[commit_id] = f"error: {e.stderr.strip() or e}"
+                        continue
+                    results[commit_id] = analyze_commit(reader, repo_name, commit_id, versions)
+    print(f"Processed repository {repo_owner}/{repo_name}: {len(results)} commits")
+    return {commit_id: results[commit_id] for commit_id in order}
+
+
+def group_fixes_by_repository(repos_fixes):
+    """Group [cve_id, hash, repo_url] fixes into repo_url -> unique commit IDs, keeping input order."""
+    grouped = defaultdict(list)
+    for fix in repos_fixes:
+        commit_ids = grouped[fix[REPO_URL_INDEX]]
+        if fix[COMMIT_ID_INDEX] not in commit_ids:
+            commit_ids.append(fix[COMMIT_ID_INDEX])
+    return dict(grouped)
+
+
+def analyze_fixes_in_parallel(repos_fixes, versions=("fix",), workers=None, repo_playground=".", commit_workers=4,
+                              mirror=None):
+    """
+    Run analyze_repository for every repository on a process pool.
+
+    With a mirror cache, its disk budget is applied once all repositories are done;
+    mirrors used by this run are never evicted.
+
+    :param repos_fixes: List of [cve_id, hash, repo_url] fixes, e.g. filtered_fixes.json
+    :param workers: Number of repositories processed at once (default: CPU count)
+    :param commit_workers: Commits analyzed at once within each repository
+    :param mirror: Optional RepoMirrorCache shared by the workers
+    :return: Dictionary of repo_url -> per-commit results
+    """
+    grouped = group_fixes_by_repository(repos_fixes)
+    run_started_at = time.time()
+    started_at = time.perf_counter()
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(
+                analyze_repository, repo_url, commit_ids, versions, repo_playground, commit_workers, mirror
+            ): repo_url
+            for repo_url, commit_ids in grouped.items()
+        }
+        for future in as_completed(futures):
+            repo_url = futures[future]
+            try:
+                results[repo_url] = future.result()
+            except Exception as e:
+                print(f"An unexpected error occurred for {repo_url}: {e}")
+                results[repo_url] = {commit_id: f"error: {e}" for commit_id in grouped[repo_url]}
+
+    if mirror is not None:
+        mirror.evict(keep_since=run_started_at)
+
+    processed = sum(status == "processed" for statuses in results.values() for status in statuses.values())
+    commits = sum(len(commit_ids) for commit_ids in grouped.values())
+    print(f"Processed {processed}/{commits} commits across {len(grouped)} repositories "
+          f"in {time.perf_counter() - started_at:.1f}s")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Save the changed Python files of CVEfixes fix commits, one clone per repository, "
+                    "processing several repositories at once."
+    )
+    parser.add_argument("--fixes", default="repos_fixes/filtered_fixes.json", help="JSON list of fixes.")
+    parser.add_argument(
+        "--version", choices=["fix", "vulnerable", "both"], default="both",
+        help="Save the files as fixed (repos_patched_analysis), as before the fix "
+             "(repos_vulnerability_analysis) or both (default)."
+    )
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count(), help="Repositories processed at once.")
+    parser.add_argument(
+        "--commit-workers", type=int, default=4, help="Commits of one repository analyzed at once (default: 4)."
+    )
+    parser.add_argument("--playground", default="repos", help="Folder where the repositories are cloned.")
+    parser.add_argument(
+        "--mirror", help="Use the shared bare-clone mirror cache in this directory instead of --playground."
+    )
+    parser.add_argument("--mirror-budget", type=parse_size, help="Disk budget of the mirror cache, e.g. 20G.")
+    parser.add_argument(
+        "--offline", action="store_true",
+        help="Only use what is already in the mirror cache. The mirrors are blob-less, so run "
+             "'repo_mirror_cache.py sync --fixes <fixes>' first to download the file contents."
+    )
+    parser.add_argument("--results", help="Optional JSON file for the per-commit results.")
+    args = parser.parse_args()
+    if args.offline and not args.mirror:
+        parser.error("--offline requires --mirror")
+
+    with open(args.fixes, 'r') as f:
+        repos_fixes = json.load(f)
+
+    versions = ("fix", "vulnerable") if args.version == "both" else (args.version,)
+    mirror = RepoMirrorCache(args.mirror, args.mirror_budget, args.offline) if args.mirror else None
+    results = analyze_fixes_in_parallel(
+        repos_fixes, versions, args.workers, args.playground, args.commit_workers, mirror
+    )
+    if args.results:
+        with open(args.results, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Analysis results saved to {args.results}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# extraction_job imports the streaming writers from CVEfixes_processing
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
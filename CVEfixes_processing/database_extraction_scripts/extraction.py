@@ -0,0 +1,115 @@
+import queue
+import sqlite3
+import mysql.connector
+from mysql.connector import Error, pooling
+
+# Connection settings shared by the extraction scripts
+DEFAULT_DB_CONFIG = {
+    "host": 'localhost',  # Replace with your MySQL host
+    "user": 'root',  # Replace with your MySQL username
+    "password": 'omar',  # Replace with your MySQL password
+    "database": 'CVE_fixes',  # Replace with your database name
+}
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def connect_to_database(**overrides):
+    """Open a MySQL connection using DEFAULT_DB_CONFIG, with keyword overrides."""
+    return mysql.connector.connect(**{**DEFAULT_DB_CONFIG, **overrides})
+
+
+def create_connection_pool(pool_size=4, **overrides):
+    """Create a MySQL connection pool; pooled connections go back to the pool on close()."""
+    return pooling.MySQLConnectionPool(
+        pool_name="cvefixes_extraction", pool_size=pool_size, **{**DEFAULT_DB_CONFIG, **overrides}
+    )
+
+
+class SQLiteConnectionPool:
+    """
+    Minimal stand-in for MySQLConnectionPool backed by a SQLite file, for local runs and tests.
+    Connections handed out by get_connection() return to the pool when closed.
+    """
+
+    def __init__(self, path, pool_size=4):
+        self.connections = queue.Queue()
+        for _ in range(pool_size):
+            self.connections.put(sqlite3.connect(path, check_same_thread=False))
+
+    def get_connection(self):
+        return PooledSQLiteConnection(self, self.connections.get())
+
+    def close(self):
+        while not self.connections.empty():
+            self.connections.get().close()
+
+
+class PooledSQLiteConnection:
+    def __init__(self, pool, connection):
+        self.pool = pool
+        self.connection = connection
+
+    def cursor(self):
+        return self.connection.cursor()
+
+    def is_connected(self):
+        return self.connection is not None
+
+    def close(self):
+        if self.connection is not None:
+            self.pool.connections.put(self.connection)
+            self.connection = None
+
+
+def stream_query(connection, query, params=None, batch_size=DEFAULT_BATCH_SIZE, as_dicts=False):
+    """
+    Execute a query and yield its rows in fetchmany batches.
+
+    The default mysql.connector cursor is unbuffered, so rows stay on the server
+    until they are fetched and at most `batch_size` rows are held in memory.
+    Works with any DB-API connection (e.g. sqlite3 for local runs).
+
+    :param connection: Open DB-API connection
+    :param query: SQL query to run
+    :param params: Optional query parameters
+    :param batch_size: Number of rows fetched per round trip
+    :param as_dicts: Yield dicts keyed by column name instead of tuples
+    """
+    cursor = connection.cursor()
+    try:
+        cursor.execute(query, params or ())
+        columns = [description[0] for description in cursor.description]
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            if as_dicts:
+                yield from (dict(zip(columns, row)) for row in rows)
+            else:
+                yield from rows
+    finally:
+        cursor.close()
+
+
+def run_extraction(query, write_rows, batch_size=DEFAULT_BATCH_SIZE, **overrides):
+    """
+    Connect, stream the rows of `query` into `write_rows` and close the connection.
+
+    :param query: SQL query to run
+    :param write_rows: Callable consuming an iterable of rows, e.g. stream_fixes_to_json_and_text
+    :param batch_size: Number of rows fetched per round trip
+    :return: Whatever write_rows returns, or None if a database error occurred
+    """
+    connection = None
+    try:
+        connection = connect_to_database(**overrides)
+        if connection.is_connected():
+            return write_rows(stream_query(connection, query, batch_size=batch_size))
+    except Error as e:
+        print(f"An error occurred: {e}")
+    finally:
+        if connection is not None and connection.is_connected():
+            # Close the database connection
+            connection.close()
+    return None
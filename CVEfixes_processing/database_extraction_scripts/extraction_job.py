@@ -0,0 +1,133 @@
+import argparse
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from mysql.connector import Error
+from extraction import create_connection_pool, SQLiteConnectionPool, stream_query, DEFAULT_BATCH_SIZE
+from save_json_and_text import (
+    JsonArrayWriter, stream_rows_to_files,
+    stream_fixes_to_json_and_text, stream_cve_cwe_data_to_json_and_text, stream_repos_to_json_and_text,
+)
+
+
+def stream_cve_to_json(rows, json_filename='cve.json'):
+    """Stream cve rows (dicts keyed by column) to a JSON list like python_vul_scores.json."""
+    return stream_rows_to_files(rows, [JsonArrayWriter(json_filename)])
+
+
+# table -> (query, writer, output files, whether rows are dicts)
+EXTRACTIONS = {
+    "fixes": ("SELECT * FROM fixes", stream_fixes_to_json_and_text, ("fixes.json", "fixes.txt"), False),
+    "cwe_classification": (
+        "SELECT * FROM cwe_classification", stream_cve_cwe_data_to_json_and_text,
+        ("cve_cwe_data.json", "cve_cwe_data.txt"), False
+    ),
+    "repository": ("SELECT url, name FROM repository", stream_repos_to_json_and_text, ("repos.json", "repos.txt"), False),
+    "cve": ("SELECT * FROM cve", stream_cve_to_json, ("cve.json",), True),
+}
+
+# The CVEfixes SQLite release names the repository columns repo_url/repo_name
+SQLITE_QUERIES = {
+    "repository": "SELECT repo_url, repo_name FROM repository",
+}
+
+# Columnar copies written with --parquet (the cve rows have no fixed column layout)
+PARQUET_FILENAMES = {
+    "fixes": "fixes.parquet",
+    "cwe_classification": "cve_cwe_data.parquet",
+    "repository": "repos.parquet",
+}
+
+
+def extract_table(pool, table, output_dir=".", batch_size=DEFAULT_BATCH_SIZE, parquet=False):
+    """
+    Stream one table to its output files on a connection borrowed from the pool.
+    With `parquet`, tables in PARQUET_FILENAMES also get a columnar copy. A SQLiteConnectionPool
+    reads the CVEfixes SQLite schema (SQLITE_QUERIES).
+
+    :return: (table, number of rows written, seconds taken)
+    """
+    query, write_rows, filenames, as_dicts = EXTRACTIONS[table]
+    if isinstance(pool, SQLiteConnectionPool):
+        query = SQLITE_QUERIES.get(table, query)
+    extra = {}
+    if parquet and table in PARQUET_FILENAMES:
+        extra["parquet_filename"] = os.path.join(output_dir, PARQUET_FILENAMES[table])
+    started_at = time.perf_counter()
+    connection = pool.get_connection()
+    rows = stream_query(connection, query, batch_size=batch_size, as_dicts=as_dicts)
+    try:
+        count = write_rows(rows, *(os.path.join(output_dir, filename) for filename in filenames), **extra)
+    finally:
+        # Closes the cursor of a stream that stopped midway before the connection goes back to the pool
+        rows.close()
+        connection.close()
+    return table, count, time.perf_counter() - started_at
+
+
+def run_extraction_job(pool, tables=tuple(EXTRACTIONS), output_dir=".", batch_size=DEFAULT_BATCH_SIZE,
+                       parquet=False):
+    """
+    Run the table extractions concurrently, one pooled connection each.
+    Every output is written to a temporary file and only replaces its target once the table
+    was streamed completely, so a table that fails keeps its previous outputs and the other
+    tables still finish.
+
+    :return: Dictionary of table -> rows written (None for tables that failed)
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    results = {}
+    with ThreadPoolExecutor(max_workers=len(tables)) as executor:
+        futures = {
+            executor.submit(extract_table, pool, table, output_dir, batch_size, parquet): table for table in tables
+        }
+        for future, table in futures.items():
+            try:
+                _, count, elapsed = future.result()
+                results[table] = count
+                print(f"Extracted {count} rows from {table} in {elapsed:.1f}s")
+            except (Error, sqlite3.Error, OSError, ImportError) as e:
+                results[table] = None
+                print(f"An error occurred while extracting {table}: {e}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Extract the fixes, cwe_classification, repository and cve tables in one run "
+                    "using pooled database connections."
+    )
+    parser.add_argument("-o", "--output-dir", default=".", help="Directory for the output files.")
+    parser.add_argument(
+        "--tables", nargs="+", choices=sorted(EXTRACTIONS), default=list(EXTRACTIONS),
+        help="Tables to extract (default: all)."
+    )
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Rows per fetchmany call.")
+    parser.add_argument(
+        "--sqlite", help="Read from this SQLite database instead of MySQL (e.g. the CVEfixes .db file)."
+    )
+    parser.add_argument(
+        "--parquet", action="store_true",
+        help="Also write fixes/cve_cwe_data/repos as Parquet with dictionary-encoded IDs (requires pyarrow)."
+    )
+    args = parser.parse_args()
+
+    try:
+        if args.sqlite:
+            pool = SQLiteConnectionPool(args.sqlite, pool_size=len(args.tables))
+        else:
+            pool = create_connection_pool(pool_size=len(args.tables))
+    except Error as e:
+        print(f"An error occurred: {e}")
+        return
+
+    results = run_extraction_job(pool, args.tables, args.output_dir, args.batch_size, args.parquet)
+    if args.sqlite:
+        pool.close()
+    print(f"Extraction job finished: {results}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import json
+import os
+import sqlite3
+
+import pytest
+
+import extraction_job
+from extraction import SQLiteConnectionPool
+from extraction_job import run_extraction_job
+
+# Subset of the CVEfixes SQLite schema the extractions read
+SCHEMA = """
+CREATE TABLE fixes (cve_id TEXT, hash TEXT, repo_url TEXT);
+CREATE TABLE cwe_classification (cve_id TEXT, cwe_id TEXT);
+CREATE TABLE repository (repo_url TEXT, repo_name TEXT, repo_language TEXT);
+CREATE TABLE cve (cve_id TEXT, published_date TEXT, cvss3_base_severity TEXT);
+"""
+FIXES = [(f"CVE-2021-{number}", f"{number:040x}", f"https://github.com/owner/repo{number % 3}") for number in range(25)]
+CWE_CLASSIFICATIONS = [(cve_id, "CWE-79") for cve_id, _, _ in FIXES] + [("CVE-2021-1", "NVD-CWE-Other")]
+REPOSITORIES = [(f"https://github.com/owner/repo{number}", f"owner/repo{number}", "Python") for number in range(3)]
+CVES = [(cve_id, "2021-01-01", "HIGH") for cve_id, _, _ in FIXES]
+
+
+@pytest.fixture
+def pool(tmp_path):
+    path = str(tmp_path / "CVEfixes.db")
+    connection = sqlite3.connect(path)
+    connection.executescript(SCHEMA)
+    connection.executemany("INSERT INTO fixes VALUES (?, ?, ?)", FIXES)
+    connection.executemany("INSERT INTO cwe_classification VALUES (?, ?)", CWE_CLASSIFICATIONS)
+    connection.executemany("INSERT INTO repository VALUES (?, ?, ?)", REPOSITORIES)
+    connection.executemany("INSERT INTO cve VALUES (?, ?, ?)", CVES)
+    connection.commit()
+    connection.close()
+    pool = SQLiteConnectionPool(path, pool_size=len(extraction_job.EXTRACTIONS))
+    yield pool
+    pool.close()
+
+
+def read_json(output_dir, filename):
+    with open(os.path.join(output_dir, filename), 'r') as f:
+        return json.load(f)
+
+
+def test_pooled_job_extracts_every_table(pool, tmp_path):
+    output_dir = str(tmp_path / "out")
+    results = run_extraction_job(pool, output_dir=output_dir, batch_size=4)
+
+    assert results == {"fixes": 25, "cwe_classification": 26, "repository": 3, "cve": 25}
+    assert read_json(output_dir, "fixes.json") == [list(fix) for fix in FIXES]
+    assert read_json(output_dir, "cve_cwe_data.json") == [
+        {"cve_id": cve_id, "cwe_id": cwe_id} for cve_id, cwe_id in CWE_CLASSIFICATIONS
+    ]
+    assert read_json(output_dir, "repos.json") == [[url, name] for url, name, _ in REPOSITORIES]
+    assert read_json(output_dir, "cve.json")[0] == {
+        "cve_id": "CVE-2021-0", "published_date": "2021-01-01", "cvss3_base_severity": "HIGH"
+    }
+    with open(os.path.join(output_dir, "repos.txt"), 'r') as f:
+        assert f.read() == "".join(f"{url},{name}\n" for url, name, _ in REPOSITORIES)
+
+
+def test_failed_table_keeps_previous_outputs(pool, tmp_path, monkeypatch):
+    output_dir = str(tmp_path / "out")
+    run_extraction_job(pool, output_dir=output_dir, batch_size=4)
+    with open(os.path.join(output_dir, "fixes.json"), 'r') as f:
+        previous_fixes = f.read()
+
+    stream_query = extraction_job.stream_query
+
+    def failing_stream_query(connection, query, **kwargs):
+        rows = stream_query(connection, query, **kwargs)
+        if "FROM fixes" not in query:
+            return rows
+
+        def fail_midway():
+            try:
+                for number, row in enumerate(rows):
+                    if number == 10:
+                        raise sqlite3.OperationalError("disk I/O error")
+                    yield row
+            finally:
+                rows.close()
+        return fail_midway()
+
+    monkeypatch.setattr(extraction_job, "stream_query", failing_stream_query)
+    results = run_extraction_job(pool, output_dir=output_dir, batch_size=4)
+
+    assert results == {"fixes": None, "cwe_classification": 26, "repository": 3, "cve": 25}
+    with open(os.path.join(output_dir, "fixes.json"), 'r') as f:
+        assert f.read() == previous_fixes
+    assert not [name for name in os.listdir(output_dir) if name.endswith(".tmp")]
@@ -1,4 +1,44 @@
+import argparse
 import json
+import sqlite3
+
+from save_json_and_text import JsonArrayWriter, TextLineWriter, stream_rows_to_files
+
+# Case-sensitive "starts with CWE-" test per dialect, matching cwe_id.startswith("CWE-")
+# (LIKE ignores case in both SQLite and MySQL's default collations)
+HAS_CWE_PREFIX = {
+    "sqlite": "GLOB 'CWE-*'",
+    "mysql": "LIKE BINARY 'CWE-%'",
+}
+
+# Dump order for the SQLite copy, as in the Python path; MySQL has no position column,
+# so its outputs are sorted on the row's columns instead
+FIXES_ORDER = {
+    "sqlite": "f.position",
+    "mysql": "f.cve_id, f.hash, f.repo_url",
+}
+CVE_CWE_ORDER = {
+    "sqlite": "position",
+    "mysql": "cve_id, cwe_id",
+}
+
+# Fixes whose CVE has at least one real CWE, filtered and joined inside the database
+FILTERED_FIXES_QUERY = """
+SELECT f.cve_id, f.hash, f.repo_url
+FROM fixes f
+WHERE EXISTS (
+    SELECT 1 FROM cwe_classification c
+    WHERE c.cve_id = f.cve_id AND c.cwe_id {has_cwe_prefix}
+)
+ORDER BY {order}
+"""
+
+CVE_CWE_QUERY = """
+SELECT cve_id, cwe_id
+FROM cwe_classification
+WHERE cwe_id {has_cwe_prefix}
+ORDER BY {order}
+"""
 
 
 def extract_fixes_of_vulnerabilities_that_have_cwe():
@@ -40,5 +80,92 @@ def extract_fixes_of_vulnerabilities_that_have_cwe():
             f.write(f"{fix}\n")
     print(f"Filtered fixes saved to repos_fixes/filtered_fixes.txt and repos_fixes/filtered_fixes.json")
 
+
+def load_dumped_rows_into_sqlite(db_path="cvefixes_dump.db",
+                                 cve_cwe_text="cve_cwe_mapping/cve_cwe_data.txt",
+                                 fixes_text="repos_fixes/fixes.txt"):
+    """
+    Load the dumped cwe_classification and fixes rows into an embedded SQLite database.
+
+    The text dumps are read line by line, so nothing is held in memory. A position
+    column in both tables keeps the original order of the rows.
+
+    :return: Open sqlite3 connection
+    """
+    connection = sqlite3.connect(db_path)
+    connection.executescript("""
+        DROP TABLE IF EXISTS cwe_classification;
+        DROP TABLE IF EXISTS fixes;
+        CREATE TABLE cwe_classification (position INTEGER PRIMARY KEY, cve_id TEXT, cwe_id TEXT);
+        CREATE TABLE fixes (position INTEGER PRIMARY KEY, cve_id TEXT, hash TEXT, repo_url TEXT);
+    """)
+    with open(cve_cwe_text, "r") as f:
+        connection.executemany(
+            "INSERT INTO cwe_classification (cve_id, cwe_id) VALUES (?, ?)",
+            (line.rstrip("\n").split(",", 1) for line in f if line.strip())
+        )
+    with open(fixes_text, "r") as f:
+        connection.executemany(
+            "INSERT INTO fixes (cve_id, hash, repo_url) VALUES (?, ?, ?)",
+            (line.rstrip("\n").split(",", 2) for line in f if line.strip())
+        )
+    connection.execute("CREATE INDEX cwe_classification_cve_id ON cwe_classification (cve_id)")
+    connection.commit()
+    return connection
+
+
+def extract_fixes_of_vulnerabilities_that_have_cwe_with_sql(connection, dialect="mysql"):
+    """
+    Pushdown variant of extract_fixes_of_vulnerabilities_that_have_cwe.
+
+    The CWE-% filter and the fixes x cwe_classification join run in the database
+    (MySQL or the embedded SQLite copy) and the matching rows are streamed straight
+    into the same output files. On the SQLite copy the outputs are identical to the
+    Python path's; MySQL has no dump order, so there the fixes and the CVE keys and
+    CWE lists of cve_cwe_mappings_dict.json are sorted by ID instead.
+
+    :param connection: DB-API connection holding the fixes and cwe_classification tables
+    :param dialect: "mysql" for the CVEfixes database, "sqlite" for the copy from
+                    load_dumped_rows_into_sqlite (which keeps the dump order)
+    """
+    cursor = connection.cursor()
+
+    cve_cwe_mappings_dict = {}
+    has_cwe_prefix = HAS_CWE_PREFIX[dialect]
+    cursor.execute(CVE_CWE_QUERY.format(has_cwe_prefix=has_cwe_prefix, order=CVE_CWE_ORDER[dialect]))
+    for cve_id, cwe_id in cursor:
+        cve_cwe_mappings_dict.setdefault(cve_id, []).append(cwe_id)
+    with open("cve_cwe_mapping/cve_cwe_mappings_dict.json", "w") as f:
+        json.dump(cve_cwe_mappings_dict, f, indent=4)
+
+    cursor.execute(FILTERED_FIXES_QUERY.format(has_cwe_prefix=has_cwe_prefix, order=FIXES_ORDER[dialect]))
+    count = stream_rows_to_files(cursor, [
+        JsonArrayWriter("repos_fixes/filtered_fixes.json", transform=list),
+        TextLineWriter("repos_fixes/filtered_fixes.txt", lambda row: f"{list(row)}"),
+    ])
+    cursor.close()
+    print(f"{count} filtered fixes saved to repos_fixes/filtered_fixes.txt and repos_fixes/filtered_fixes.json")
+    return count
+
+
 if __name__ == "__main__":
-    extract_fixes_of_vulnerabilities_that_have_cwe()
+    parser = argparse.ArgumentParser(description="Keep only the fixes of CVEs that have a CWE.")
+    parser.add_argument(
+        "--mode", choices=["python", "sqlite", "mysql"], default="python",
+        help="python: filter the JSON dumps in memory (default); sqlite: push the join into an embedded "
+             "SQLite copy of the text dumps; mysql: push the join into the CVEfixes database."
+    )
+    parser.add_argument("--db", default="cvefixes_dump.db", help="SQLite file used by --mode sqlite.")
+    args = parser.parse_args()
+
+    if args.mode == "sqlite":
+        connection = load_dumped_rows_into_sqlite(args.db)
+        extract_fixes_of_vulnerabilities_that_have_cwe_with_sql(connection, dialect="sqlite")
+        connection.close()
+    elif args.mode == "mysql":
+        from database_extraction_scripts.extraction import connect_to_database
+        connection = connect_to_database()
+        extract_fixes_of_vulnerabilities_that_have_cwe_with_sql(connection)
+        connection.close()
+    else:
+        extract_fixes_of_vulnerabilities_that_have_cwe()
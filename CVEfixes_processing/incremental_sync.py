@@ -0,0 +1,209 @@
+import argparse
+import ast
+import itertools
+import json
+import os
+import re
+from datetime import datetime, timezone
+from typing import Callable, Iterable, List, Optional, Set, Tuple
+
+from save_json_and_text import (
+    AtomicFileWriter, JsonArrayWriter, TextLineWriter, stage_rows_to_files, write_json_atomically
+)
+from sql_dump_reader import SQLDumpReader
+
+DEFAULT_STATE_FILE = "cvefixes_sync_state.json"
+DATASET_VERSION_PATTERN = re.compile(r'v(\d+(?:\.\d+)*)')
+
+# Artifacts the sync appends to: (text file, json file)
+FIXES_FILES = ("repos_fixes/fixes.txt", "repos_fixes/fixes.json")
+FILTERED_FIXES_FILES = ("repos_fixes/filtered_fixes.txt", "repos_fixes/filtered_fixes.json")
+CVE_CWE_FILES = ("cve_cwe_mapping/cve_cwe_data.txt", "cve_cwe_mapping/cve_cwe_data.json")
+REPOS_FILES = ("repos_metadata/repos.txt", "repos_metadata/repos.json")
+
+
+def dataset_version_from_path(path: str) -> Optional[str]:
+    """'CVEfixes_v1.0.8.sql.gz' -> 'v1.0.8'"""
+    match = DATASET_VERSION_PATTERN.search(os.path.basename(path))
+    return f"v{match.group(1)}" if match else None
+
+
+def load_state(filename: str = DEFAULT_STATE_FILE) -> dict:
+    """Load the sync state, or an empty state if no sync has run yet."""
+    if not os.path.exists(filename):
+        return {}
+    with open(filename, 'r') as f:
+        return json.load(f)
+
+
+def read_text_rows(filename: str, parse_line: Callable[[str], tuple]) -> Iterable[tuple]:
+    """Yield the parsed rows of a text artifact; a missing file has no rows."""
+    if not os.path.exists(filename):
+        return
+    with open(filename, 'r') as f:
+        for line in f:
+            if line.strip():
+                yield parse_line(line.rstrip("\n"))
+
+
+def stage_appended_rows(files: Tuple[str, str], new_rows: List[tuple], parse_line: Callable[[str], tuple],
+                        format_line: Callable[[tuple], str],
+                        transform: Optional[Callable] = None) -> List[AtomicFileWriter]:
+    """
+    Write a text artifact plus `new_rows`, and its JSON twin, to temp files next to them.
+
+    The targets are not touched yet: the caller commits the returned writers once
+    every artifact is staged (or aborts them).
+    """
+    text_filename, json_filename = files
+    os.makedirs(os.path.dirname(os.path.abspath(text_filename)), exist_ok=True)
+    writers = [TextLineWriter(text_filename, format_line), JsonArrayWriter(json_filename, transform=transform)]
+    stage_rows_to_files(itertools.chain(read_text_rows(text_filename, parse_line), new_rows), writers)
+    return writers
+
+
+def parse_fix_line(line: str) -> list:
+    return line.split(",", 2)
+
+
+def parse_pair_line(line: str) -> list:
+    return line.split(",", 1)
+
+
+def parse_filtered_fix_line(line: str) -> list:
+    return ast.literal_eval(line)
+
+
+def sync(dump: str, state_filename: str = DEFAULT_STATE_FILE, dataset_version: Optional[str] = None,
+         backslash_escapes: bool = False, force: bool = False) -> dict:
+    """
+    Bring the fixes, CVE-CWE and repository artifacts up to date with a newer CVEfixes dump.
+
+    Every delta is taken against the artifacts themselves: fixes are new when their
+    (cve_id, hash) is not in fixes.txt yet, CWE classifications when their (cve_id, cwe_id)
+    pair is not in cve_cwe_data.txt yet, and filtered fixes are all fixes of CVEs with a
+    CWE that are not in filtered_fixes.txt yet. The CVE date watermarks are only recorded
+    to report how many CVEs were published or modified since the last sync.
+
+    All artifacts are first written to temp files and only replace the old ones once
+    every one of them was written; the state file comes last. Since the deltas do not
+    depend on the state, re-running after a crash in between neither duplicates nor
+    misses rows.
+
+    :param dump: Path to CVEfixes_vX.sql.gz
+    :param state_filename: JSON file holding the dataset version and watermarks
+    :param dataset_version: Version of the dump (default: parsed from the file name)
+    :param force: Sync even if this dataset version was already processed
+    :return: The new state
+    """
+    state = load_state(state_filename)
+    dataset_version = dataset_version or dataset_version_from_path(dump)
+    if not force and dataset_version and state.get("dataset_version") == dataset_version:
+        print(f"CVEfixes {dataset_version} is already synced, nothing to do")
+        return state
+
+    known_fixes: Set[tuple] = {(row[0], row[1]) for row in read_text_rows(FIXES_FILES[0], parse_fix_line)}
+    known_pairs: Set[tuple] = {tuple(row) for row in read_text_rows(CVE_CWE_FILES[0], parse_pair_line)}
+    known_repos: Set[str] = {row[0] for row in read_text_rows(REPOS_FILES[0], parse_pair_line)}
+    known_filtered_fixes: Set[tuple] = {
+        (row[0], row[1]) for row in read_text_rows(FILTERED_FIXES_FILES[0], parse_filtered_fix_line)
+    }
+    published_watermark = state.get("cve_published_watermark")
+    modified_watermark = state.get("cve_modified_watermark")
+    print(f"Known rows: {len(known_fixes)} fixes, {len(known_pairs)} CVE-CWE pairs, {len(known_repos)} repositories")
+
+    new_fixes: List[tuple] = []
+    new_pairs: List[tuple] = []
+    new_repos: List[tuple] = []
+    changed_cves: Set[str] = set()
+    max_published, max_modified = published_watermark, modified_watermark
+
+    reader = SQLDumpReader(dump, backslash_escapes)
+    for table, row in reader.rows({"cve", "fixes", "cwe_classification", "repository"}):
+        if table == "fixes":
+            if (row[0], row[1]) not in known_fixes:
+                known_fixes.add((row[0], row[1]))
+                new_fixes.append(tuple(row[:3]))
+        elif table == "cwe_classification":
+            # As written to cve_cwe_data.txt, where a NULL cwe_id reads back as "None"
+            pair = (row[0], str(row[1]))
+            if pair not in known_pairs:
+                known_pairs.add(pair)
+                new_pairs.append(pair)
+        elif table == "repository":
+            if row[0] not in known_repos:
+                columns = reader.columns.get("repository", [])
+                name_index = columns.index("repo_name") if "repo_name" in columns else 1
+                known_repos.add(row[0])
+                new_repos.append((row[0], row[name_index]))
+        else:
+            columns = reader.columns.get("cve", [])
+            record = dict(zip(columns, row))
+            published = record.get("published_date")
+            modified = record.get("last_modified_date") or published
+            if (published_watermark is None or (published and published > published_watermark)
+                    or (modified and modified_watermark and modified > modified_watermark)):
+                changed_cves.add(row[0])
+            if published and (max_published is None or published > max_published):
+                max_published = published
+            if modified and (max_modified is None or modified > max_modified):
+                max_modified = modified
+
+    # Fixes already on disk become relevant too once their CVE gets its first CWE
+    cves_with_cwe: Set[str] = {cve_id for cve_id, cwe_id in known_pairs if cwe_id.startswith("CWE-")}
+    new_filtered_fixes = [
+        tuple(fix) for fix in itertools.chain(read_text_rows(FIXES_FILES[0], parse_fix_line), new_fixes)
+        if fix[0] in cves_with_cwe and (fix[0], fix[1]) not in known_filtered_fixes
+    ]
+
+    staged: List[AtomicFileWriter] = []
+    try:
+        staged += stage_appended_rows(FIXES_FILES, new_fixes, parse_fix_line, lambda row: f"{row[0]},{row[1]},{row[2]}")
+        staged += stage_appended_rows(FILTERED_FIXES_FILES, new_filtered_fixes, parse_filtered_fix_line,
+                                      lambda row: f"{list(row)}")
+        staged += stage_appended_rows(CVE_CWE_FILES, new_pairs, parse_pair_line, lambda row: f"{row[0]},{row[1]}",
+                                      transform=lambda row: {"cve_id": row[0], "cwe_id": row[1]})
+        staged += stage_appended_rows(REPOS_FILES, new_repos, parse_pair_line, lambda row: f"{row[0]},{row[1]}")
+    except BaseException:
+        for writer in staged:
+            writer.abort()
+        raise
+    for writer in staged:
+        writer.commit()
+
+    state = {
+        "dataset_version": dataset_version,
+        "cve_published_watermark": max_published,
+        "cve_modified_watermark": max_modified,
+        "last_fix_hash": new_fixes[-1][1] if new_fixes else state.get("last_fix_hash"),
+        "synced_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "appended": {
+            "fixes": len(new_fixes),
+            "filtered_fixes": len(new_filtered_fixes),
+            "cve_cwe_data": len(new_pairs),
+            "repos": len(new_repos),
+        },
+    }
+    write_json_atomically(state, state_filename)
+    print(f"Synced CVEfixes {dataset_version}: {state['appended']} ({len(changed_cves)} new or changed CVEs)")
+    return state
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Append only the new or changed rows of a newer CVEfixes dump to the existing "
+                    "fixes, CVE-CWE and repository artifacts.",
+        epilog="Example: python incremental_sync.py CVEfixes_v1.0.9.sql.gz"
+    )
+    parser.add_argument("dump", help="Path to CVEfixes_vX.sql.gz (or an uncompressed .sql file).")
+    parser.add_argument("--state", default=DEFAULT_STATE_FILE, help="Sync state file.")
+    parser.add_argument("--dataset-version", help="Dataset version of the dump (default: parsed from its name).")
+    parser.add_argument("--backslash-escapes", action="store_true", help="Dump uses MySQL-style \\' escapes.")
+    parser.add_argument("--force", action="store_true", help="Sync even if the version was already processed.")
+    args = parser.parse_args()
+
+    sync(args.dump, args.state, args.dataset_version, args.backslash_escapes, args.force)
+
+
+if __name__ == "__main__":
+    main()
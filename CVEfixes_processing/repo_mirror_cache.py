@@ -0,0 +1,262 @@
+import argparse
+import fcntl
+import json
+import os
+import re
+import shutil
+import subprocess
+import time
+from contextlib import contextmanager
+
+DEFAULT_MIRROR_ROOT = "repo_mirrors"
+SIZE_PATTERN = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([KMGT]?)i?B?\s*$', re.IGNORECASE)
+SIZE_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+
+# Makes every git transport fail immediately, including the lazy blob fetches of partial clones
+OFFLINE_GIT_ENV = {
+    "GIT_CONFIG_COUNT": "1",
+    "GIT_CONFIG_KEY_0": "protocol.allow",
+    "GIT_CONFIG_VALUE_0": "never",
+    "GIT_TERMINAL_PROMPT": "0",
+}
+
+
+class MirrorUnavailable(Exception):
+    """Raised in offline mode when a repository has no mirror yet."""
+
+
+def parse_size(text):
+    """'20G' -> 21474836480; plain numbers are bytes."""
+    match = SIZE_PATTERN.match(str(text))
+    if not match:
+        raise ValueError(f"Invalid size: {text}")
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).upper()])
+
+
+def directory_size(path):
+    total = 0
+    for directory, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(directory, name)).st_size
+            except FileNotFoundError:
+                pass
+    return total
+
+
+def read_repos_file(filename="repos_metadata/repos.txt"):
+    """Yield the repository URLs of a repos.txt file ("url,owner/name" per line)."""
+    with open(filename, 'r') as f:
+        for line in f:
+            if line.strip():
+                yield line.split(",", 1)[0].strip()
+
+
+class RepoMirrorCache:
+    """
+    One bare, blob-less (--filter=blob:none) clone per repository, shared by every run.
+
+    Commits are fetched only when missing and file contents are downloaded lazily
+    the first time they are read, after which they stay in the mirror. Offline runs
+    cannot download anything, so the contents they read must be prefetched first
+    (prefetch_blobs, or `sync --fixes`). A mirror's
+    directory mtime records when it was last used, and evict() removes the least
+    recently used mirrors until the cache fits its disk budget.
+
+    Examples:
+        >>> cache = RepoMirrorCache("repo_mirrors", max_bytes=parse_size("20G"))
+        >>> repo_path = cache.ensure("https://github.com/owner/name")
+        >>> cache.ensure_commits(repo_path, ["1f2e3d..."])
+    """
+
+    def __init__(self, root=DEFAULT_MIRROR_ROOT, max_bytes=None, offline=False):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.offline = offline
+        os.makedirs(root, exist_ok=True)
+
+    def git_env(self):
+        """Environment for git commands on the mirrors (None: inherit the current one)."""
+        return {**os.environ, **OFFLINE_GIT_ENV} if self.offline else None
+
+    def _git(self, *args, check=True, input=None):
+        return subprocess.run(["git", *args], check=check, capture_output=True, text=True, input=input,
+                              env=self.git_env())
+
+    @contextmanager
+    def _locked(self):
+        """Serialize clones and evictions between the processes sharing the cache."""
+        with open(os.path.join(self.root, ".lock"), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def mirror_path(self, repo_url):
+        repo_owner, repo_name = repo_url.rstrip("/").split("/")[-2:]
+        return os.path.join(self.root, repo_owner, repo_name.removesuffix(".git") + ".git")
+
+    def mirrors(self):
+        """List the mirror directories in the cache."""
+        paths = []
+        for owner in os.listdir(self.root):
+            owner_path = os.path.join(self.root, owner)
+            if os.path.isdir(owner_path):
+                paths.extend(
+                    os.path.join(owner_path, name) for name in os.listdir(owner_path) if name.endswith(".git")
+                )
+        return paths
+
+    def ensure(self, repo_url):
+        """Return the path of the repository's mirror, cloning it first if needed."""
+        path = self.mirror_path(repo_url)
+        if not os.path.isdir(path):
+            if self.offline:
+                raise MirrorUnavailable(f"No mirror of {repo_url} in {self.root}")
+            with self._locked():
+                if not os.path.isdir(path):
+                    print(f"Mirroring {repo_url} to {path}...")
+                    temp_path = f"{path}.partial"
+                    shutil.rmtree(temp_path, ignore_errors=True)
+                    self._git("clone", "--quiet", "--bare", "--filter=blob:none", repo_url, temp_path)
+                    self._git("-C", temp_path, "config", "remote.origin.fetch", "+refs/heads/*:refs/heads/*")
+                    os.replace(temp_path, path)
+        # Mark as recently used for the LRU eviction
+        os.utime(path)
+        return path
+
+    def has_commit(self, path, commit_id):
+        return self._git("-C", path, "cat-file", "-e", f"{commit_id}^{{commit}}", check=False).returncode == 0
+
+    def ensure_commits(self, path, commit_ids):
+        """
+        Fetch the commits the mirror does not have yet, all in one fetch if possible.
+
+        :return: The commits that are still missing (always all missing ones when offline)
+        """
+        missing = [commit_id for commit_id in commit_ids if not self.has_commit(path, commit_id)]
+        if not missing or self.offline:
+            return missing
+        if self._git("-C", path, "fetch", "--quiet", "--filter=blob:none", "origin", *missing,
+                     check=False).returncode != 0:
+            for commit_id in missing:
+                self._git("-C", path, "fetch", "--quiet", "--filter=blob:none", "origin", commit_id, check=False)
+        return [commit_id for commit_id in missing if not self.has_commit(path, commit_id)]
+
+    def prefetch_blobs(self, path, commit_ids):
+        """
+        Download the old and new contents of every file the commits change, in one fetch,
+        so the commits can later be diffed and read offline.
+
+        :return: Number of blobs requested (ones already in the mirror are not downloaded again)
+        """
+        blob_ids = set()
+        for commit_id in commit_ids:
+            # ":<old mode> <new mode> <old blob> <new blob> <status>\t<path>"; only needs the trees
+            diff = self._git("-C", path, "diff-tree", "-r", f"{commit_id}^", commit_id, check=False)
+            for line in diff.stdout.splitlines():
+                old_blob, new_blob = line.split("\t", 1)[0].split()[2:4]
+                blob_ids.update(blob_id for blob_id in (old_blob, new_blob) if blob_id.strip("0"))
+        if blob_ids and not self.offline:
+            # The same request git sends for a lazy fetch, but for all blobs at once
+            self._git("-C", path, "fetch", "--quiet", "--no-tags", "--no-write-fetch-head", "--filter=blob:none",
+                      "--stdin", "origin", input="\n".join(sorted(blob_ids)) + "\n")
+        return len(blob_ids)
+
+    def update(self, repo_url):
+        """Clone or fetch the latest branches of a repository."""
+        path = self.ensure(repo_url)
+        if not self.offline:
+            self._git("-C", path, "fetch", "--quiet", "--prune", "origin")
+        return path
+
+    def usage(self):
+        """List (path, size in bytes, last used timestamp) of every mirror, least recently used first."""
+        entries = [(path, directory_size(path), os.stat(path).st_mtime) for path in self.mirrors()]
+        return sorted(entries, key=lambda entry: entry[2])
+
+    def evict(self, max_bytes=None, keep_since=None):
+        """
+        Remove least recently used mirrors until the cache fits in `max_bytes`.
+
+        :param max_bytes: Disk budget (default: the cache's max_bytes; None disables eviction)
+        :param keep_since: Never evict mirrors used at or after this timestamp (e.g. the start of a run)
+        :return: Paths of the evicted mirrors
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        if max_bytes is None:
+            return []
+        evicted = []
+        with self._locked():
+            entries = self.usage()
+            total = sum(size for _, size, _ in entries)
+            for path, size, last_used in entries:
+                if total <= max_bytes:
+                    break
+                if keep_since is not None and last_used >= keep_since:
+                    continue
+                shutil.rmtree(path)
+                total -= size
+                evicted.append(path)
+                print(f"Evicted {path} ({size / 1024 ** 2:.1f} MiB)")
+        return evicted
+
+
+def read_fixes_file(filename):
+    """Group the [cve_id, hash, repo_url] fixes of a JSON list (e.g. filtered_fixes.json) by repository URL."""
+    with open(filename, 'r') as f:
+        fixes = json.load(f)
+    grouped = {}
+    for _, commit_id, repo_url in fixes:
+        commit_ids = grouped.setdefault(repo_url, [])
+        if commit_id not in commit_ids:
+            commit_ids.append(commit_id)
+    return grouped
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Manage the shared bare-clone mirror cache of the repositories in repos.txt."
+    )
+    parser.add_argument("command", choices=["sync", "evict", "status"],
+                        help="sync: clone or update every repository; evict: apply the disk budget; "
+                             "status: list mirrors and their sizes.")
+    parser.add_argument("--repos", default="repos_metadata/repos.txt", help="File with one 'url,name' per line.")
+    parser.add_argument("--root", default=DEFAULT_MIRROR_ROOT, help="Mirror cache directory.")
+    parser.add_argument("--budget", type=parse_size, help="Disk budget, e.g. 20G.")
+    parser.add_argument(
+        "--fixes",
+        help="With sync: JSON list of fixes (e.g. repos_fixes/filtered_fixes.json) whose commits and changed "
+             "file contents are fetched too, so commit_analysis.py --offline can run on the mirrors."
+    )
+    args = parser.parse_args()
+
+    cache = RepoMirrorCache(args.root, args.budget)
+    started_at = time.time()
+    if args.command == "sync":
+        fixes = read_fixes_file(args.fixes) if args.fixes else {}
+        repo_urls = list(read_repos_file(args.repos))
+        repo_urls += [repo_url for repo_url in fixes if repo_url not in repo_urls]
+        for repo_url in repo_urls:
+            try:
+                path = cache.update(repo_url)
+                if repo_url in fixes:
+                    missing = cache.ensure_commits(path, fixes[repo_url])
+                    if missing:
+                        print(f"{len(missing)} commits of {repo_url} are not on the remote")
+                    cache.prefetch_blobs(path, [commit_id for commit_id in fixes[repo_url] if commit_id not in missing])
+            except subprocess.CalledProcessError as e:
+                print(f"An error occurred while mirroring {repo_url}: {e.stderr.strip()}")
+        cache.evict(keep_since=started_at)
+    elif args.command == "evict":
+        cache.evict()
+    else:
+        entries = cache.usage()
+        for path, size, last_used in entries:
+            print(f"{size / 1024 ** 2:10.1f} MiB  {time.strftime('%Y-%m-%d %H:%M', time.localtime(last_used))}  {path}")
+        print(f"{sum(size for _, size, _ in entries) / 1024 ** 2:.1f} MiB in {len(entries)} mirrors")
+
+
+if __name__ == "__main__":
+    main()
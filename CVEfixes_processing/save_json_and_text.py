@@ -1,5 +1,8 @@
+import abc
 import json
 import os
+import textwrap
+import threading
 
 def save_cve_cwe_data_to_json(data_tuples, filename='cve_cwe_data.json'):
     """
@@ -79,6 +82,318 @@ def save_repos_text(repos_data, filename='repos.txt'):
             text_file.write(f"{url},{name}\n")
         print(f"Repository data saved to {filename}")
 
+def temp_filename_for(filename):
+    """Temp file next to `filename`, unique per process and thread."""
+    return f"{filename}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+def write_json_atomically(data, filename, indent=4):
+    """Write JSON to a temp file next to `filename` and rename it over the target."""
+    temp_filename = temp_filename_for(filename)
+    try:
+        with open(temp_filename, 'w') as f:
+            json.dump(data, f, indent=indent)
+        os.replace(temp_filename, filename)
+    except BaseException:
+        if os.path.exists(temp_filename):
+            os.unlink(temp_filename)
+        raise
+
+
+class AtomicFileWriter(abc.ABC):
+    """
+    Base of the streaming writers. Output goes to a temp file next to `filename`,
+    which replaces it only once the writer is closed, so a stream that fails midway
+    never leaves a well-formed but truncated file behind; abort() discards it instead.
+
+    Subclasses implement finish() (write any trailer and release the file) and
+    release() (release the file as is).
+    """
+
+    def _open_temp(self, filename):
+        self.filename = filename
+        self.temp_filename = temp_filename_for(filename)
+        return self.temp_filename
+
+    @abc.abstractmethod
+    def finish(self):
+        """Write any trailer and release the file."""
+
+    @abc.abstractmethod
+    def release(self):
+        """Release the file as is."""
+
+    def commit(self):
+        """Move the finished temp file over the target."""
+        os.replace(self.temp_filename, self.filename)
+
+    def close(self):
+        self.finish()
+        self.commit()
+
+    def abort(self):
+        try:
+            self.release()
+        except Exception:
+            # The output is being discarded; a writer that cannot even close must not hide the original error
+            pass
+        if os.path.exists(self.temp_filename):
+            os.unlink(self.temp_filename)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class JsonArrayWriter(AtomicFileWriter):
+    """
+    Write a JSON array one item at a time.
+
+    The output is identical to json.dump(items, f, indent=4), but items are
+    written as they arrive so the whole list never has to be in memory.
+    """
+
+    def __init__(self, filename, indent=4, transform=None):
+        self.indent = indent
+        self.transform = transform
+        self.count = 0
+        self.file = open(self._open_temp(filename), 'w')
+
+    def write(self, item):
+        if self.transform is not None:
+            item = self.transform(item)
+        item_json = textwrap.indent(json.dumps(item, indent=self.indent), ' ' * self.indent)
+        self.file.write(("[\n" if self.count == 0 else ",\n") + item_json)
+        self.count += 1
+
+    def finish(self):
+        self.file.write("[]" if self.count == 0 else "\n]")
+        self.file.close()
+
+    def release(self):
+        self.file.close()
+
+
+class TextLineWriter(AtomicFileWriter):
+    """Write one formatted line per row to a text file."""
+
+    def __init__(self, filename, formatter):
+        self.formatter = formatter
+        self.count = 0
+        self.file = open(self._open_temp(filename), 'w')
+
+    def write(self, row):
+        self.file.write(self.formatter(row) + "\n")
+        self.count += 1
+
+    def finish(self):
+        self.file.close()
+
+    def release(self):
+        self.file.close()
+
+
+# Parquet/Arrow column layouts: (column name, whether the column is dictionary-encoded).
+# ID columns repeat a lot (one CVE has many fixes, one CWE many CVEs), so they are stored
+# as dictionary indices; hashes and names are mostly unique and stay plain strings.
+CVE_CWE_COLUMNS = (("cve_id", True), ("cwe_id", True))
+FIXES_COLUMNS = (("cve_id", True), ("hash", False), ("repo_url", True))
+REPOS_COLUMNS = (("repo_url", False), ("repo_name", False))
+
+
+class ColumnarWriter(AtomicFileWriter):
+    """
+    Write rows to a columnar file in record batches of `batch_size` rows.
+
+    Files ending in .arrow or .arrows are written as an Arrow IPC stream, anything else
+    as zstd-compressed Parquet. Requires pyarrow, which is only imported when a
+    columnar file is actually written.
+
+    Examples:
+        >>> import pyarrow.parquet as pq
+        >>> pq.read_table('fixes.parquet', columns=['cve_id', 'repo_url'])
+    """
+
+    def __init__(self, filename, columns, batch_size=65536):
+        try:
+            import pyarrow as pa
+        except ImportError as e:
+            raise ImportError("Writing Parquet/Arrow files requires pyarrow (pip install pyarrow)") from e
+        self.pa = pa
+        self.columns = columns
+        self.batch_size = batch_size
+        self.count = 0
+        self.pending = []
+        self.schema = pa.schema([
+            (name, pa.dictionary(pa.int32(), pa.string()) if encoded else pa.string())
+            for name, encoded in columns
+        ])
+        if filename.endswith(('.arrow', '.arrows')):
+            # The stream format allows each batch to carry its own dictionary
+            self.writer = pa.ipc.new_stream(self._open_temp(filename), self.schema)
+        else:
+            import pyarrow.parquet as pq
+            self.writer = pq.ParquetWriter(self._open_temp(filename), self.schema, compression='zstd')
+
+    def write(self, row):
+        self.pending.append(row)
+        self.count += 1
+        if len(self.pending) >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        if not self.pending:
+            return
+        arrays = []
+        for index, (_, encoded) in enumerate(self.columns):
+            array = self.pa.array([row[index] for row in self.pending], type=self.pa.string())
+            arrays.append(array.dictionary_encode() if encoded else array)
+        self.writer.write_batch(self.pa.RecordBatch.from_arrays(arrays, schema=self.schema))
+        self.pending = []
+
+    def finish(self):
+        self._flush()
+        self.writer.close()
+
+    def release(self):
+        self.writer.close()
+
+
+def save_cve_cwe_data_to_parquet(data_tuples, filename='cve_cwe_data.parquet'):
+    """
+    Save CVE-CWE tuples to a Parquet (or .arrow) file with dictionary-encoded IDs.
+
+    Args:
+        data_tuples: List of tuples in format ('CVE-ID', 'CWE-ID')
+        filename: Output Parquet filename
+    """
+    return stream_rows_to_files(data_tuples, [ColumnarWriter(filename, CVE_CWE_COLUMNS)])
+
+
+def save_fixes_to_parquet(fixes, filename='fixes.parquet'):
+    """
+    Save fixes data to a Parquet (or .arrow) file with dictionary-encoded CVE IDs and repository URLs.
+
+    Args:
+        fixes: List of tuples in format ('CVE-ID', 'commit hash', 'repository URL')
+        filename: Output Parquet filename
+    """
+    return stream_rows_to_files(fixes, [ColumnarWriter(filename, FIXES_COLUMNS)])
+
+
+def save_repos_parquet(repos_data, filename='repos.parquet'):
+    """
+    Save repository data to a Parquet (or .arrow) file.
+
+    Args:
+        repos_data: List of tuples in format ('repository URL', 'repository name')
+        filename: Output Parquet filename
+    """
+    return stream_rows_to_files(repos_data, [ColumnarWriter(filename, REPOS_COLUMNS)])
+
+
+def stage_rows_to_files(rows, writers):
+    """
+    Send every row to all writers as it arrives and finish them, without replacing
+    the targets yet; the caller commit()s the writers, or abort()s them to discard
+    the temp files. If the rows or a writer fail, all temp files are discarded here.
+
+    Returns:
+        Number of rows written
+    """
+    count = 0
+    try:
+        for row in rows:
+            for writer in writers:
+                writer.write(row)
+            count += 1
+        for writer in writers:
+            writer.finish()
+    except BaseException:
+        for writer in writers:
+            writer.abort()
+        raise
+    return count
+
+
+def stream_rows_to_files(rows, writers):
+    """
+    Send every row to all writers as it arrives, then close them.
+
+    The outputs only replace their targets once every row was written and every
+    writer finished; if the rows or a writer fail, all temp files are discarded
+    and the previous outputs stay as they were.
+
+    Args:
+        rows: Iterable of rows, e.g. a database cursor stream
+        writers: JsonArrayWriter/TextLineWriter/ColumnarWriter instances
+
+    Returns:
+        Number of rows written
+    """
+    count = stage_rows_to_files(rows, writers)
+    for writer in writers:
+        writer.commit()
+        print(f"Data saved to {writer.filename}")
+    return count
+
+
+def stream_cve_cwe_data_to_json_and_text(rows, json_filename='cve_cwe_data.json', text_filename='cve_cwe_data.txt',
+                                         parquet_filename=None):
+    """
+    Stream CVE-CWE rows to the same JSON and text files as save_cve_cwe_data_to_json/_to_text.
+
+    Args:
+        rows: Iterable of tuples in format ('CVE-ID', 'CWE-ID')
+        parquet_filename: Optional .parquet/.arrow file written alongside (requires pyarrow)
+    """
+    # Open the columnar writer first so a missing pyarrow fails before any file is created
+    writers = [ColumnarWriter(parquet_filename, CVE_CWE_COLUMNS)] if parquet_filename else []
+    writers += [
+        JsonArrayWriter(json_filename, transform=lambda row: {"cve_id": row[0], "cwe_id": row[1]}),
+        TextLineWriter(text_filename, lambda row: f"{row[0]},{row[1]}"),
+    ]
+    return stream_rows_to_files(rows, writers)
+
+
+def stream_fixes_to_json_and_text(rows, json_filename='fixes.json', text_filename='fixes.txt',
+                                  parquet_filename=None):
+    """
+    Stream fixes rows to the same JSON and text files as save_fixes_to_json/_to_text.
+
+    Args:
+        rows: Iterable of tuples in format ('CVE-ID', 'commit hash', 'repository URL')
+        parquet_filename: Optional .parquet/.arrow file written alongside (requires pyarrow)
+    """
+    writers = [ColumnarWriter(parquet_filename, FIXES_COLUMNS)] if parquet_filename else []
+    writers += [
+        JsonArrayWriter(json_filename),
+        TextLineWriter(text_filename, lambda row: f"{row[0]},{row[1]},{row[2]}"),
+    ]
+    return stream_rows_to_files(rows, writers)
+
+
+def stream_repos_to_json_and_text(rows, json_filename='repos.json', text_filename='repos.txt',
+                                  parquet_filename=None):
+    """
+    Stream repository rows to the same JSON and text files as save_repos_json/save_repos_text.
+
+    Args:
+        rows: Iterable of tuples in format ('repository URL', 'repository name')
+        parquet_filename: Optional .parquet/.arrow file written alongside (requires pyarrow)
+    """
+    writers = [ColumnarWriter(parquet_filename, REPOS_COLUMNS)] if parquet_filename else []
+    writers += [
+        JsonArrayWriter(json_filename),
+        TextLineWriter(text_filename, lambda row: f"{row[0]},{row[1]}"),
+    ]
+    return stream_rows_to_files(rows, writers)
+
 # Example usage
 # if __name__ == "__main__":
 #     # Example list of CVE-CWE tuples
@@ -0,0 +1,265 @@
+import argparse
+import gzip
+import json
+import re
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from save_json_and_text import (
+    save_cve_cwe_data_to_json, save_cve_cwe_data_to_text,
+    save_fixes_to_json, save_fixes_to_text,
+    save_repos_json, save_repos_text,
+)
+
+INSERT_PATTERN = re.compile(r'^\s*INSERT\s+(?:OR\s+\w+\s+)?INTO\s+[`"\[]?(\w+)[`"\]]?', re.IGNORECASE)
+CREATE_TABLE_PATTERN = re.compile(r'^\s*CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?[`"\[]?(\w+)[`"\]]?', re.IGNORECASE)
+VALUES_PATTERN = re.compile(r'\bVALUES\b', re.IGNORECASE)
+CONSTRAINT_KEYWORDS = {"PRIMARY", "FOREIGN", "UNIQUE", "CONSTRAINT", "KEY", "INDEX", "CHECK"}
+
+# Literals besides strings: X'ab' / 0xab blobs, b'101' bits, NULL, TRUE/FALSE, numbers, and punctuation
+OTHER_TOKENS = (
+    r"|[xX]'(?P<blob>[0-9a-fA-F]*)'|0x(?P<hex>[0-9a-fA-F]+)|[bB]'(?P<bits>[01]*)'"
+    r"|(?P<null>NULL)\b|(?P<boolean>TRUE|FALSE)\b"
+    r"|(?P<number>[-+]?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?)|(?P<punct>[(),;]))"
+)
+# One SQL literal or punctuation mark; strings use standard '' escaping (sqlite3 .dump)
+STANDARD_TOKEN_PATTERN = re.compile(r"\s*(?:'(?P<string>(?:[^']|'')*)'" + OTHER_TOKENS, re.IGNORECASE)
+# Same, but also accepting backslash escapes inside strings (mysqldump)
+BACKSLASH_TOKEN_PATTERN = re.compile(
+    r"\s*(?:'(?P<string>(?:[^'\\]|\\.|'')*)'" + OTHER_TOKENS, re.IGNORECASE | re.DOTALL
+)
+BACKSLASH_ESCAPES = {'0': '\0', 'b': '\b', 'n': '\n', 'r': '\r', 't': '\t', 'Z': '\x1a'}
+
+# (column index, allowed values) used to keep only matching rows of a table
+RowFilter = Tuple[int, Set[str]]
+
+
+def open_dump(path: str):
+    """Open a .sql or .sql.gz dump as text; the gzip stream is decompressed lazily."""
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', errors='replace')
+    return open(path, 'r', encoding='utf-8', errors='replace')
+
+
+class SQLDumpReader:
+    """
+    Single-pass reader for SQL dumps such as CVEfixes_v1.0.8.sql.gz.
+
+    The dump is read line by line and statements are assembled across lines
+    (string literals may contain newlines). INSERT statements for tables that
+    nobody asked for are skipped without tokenizing them, and column names are
+    picked up from the CREATE TABLE statements on the way.
+
+    Examples:
+        >>> reader = SQLDumpReader('CVEfixes_v1.0.8.sql.gz')
+        >>> fixes = []
+        >>> reader.route({'fixes': fixes.append}, {'fixes': (0, {'CVE-2021-1234'})})
+    """
+
+    def __init__(self, path: str, backslash_escapes: bool = False):
+        self.path = path
+        self.backslash_escapes = backslash_escapes
+        self.token_pattern = BACKSLASH_TOKEN_PATTERN if backslash_escapes else STANDARD_TOKEN_PATTERN
+        self.columns: Dict[str, List[str]] = {}
+
+    def _quotes_toggle(self, line: str) -> bool:
+        """Whether a line flips the inside-a-string state, i.e. has an odd number of real quotes."""
+        if self.backslash_escapes and '\\' in line:
+            line = re.sub(r'\\.', '', line)
+        return line.count("'") % 2 == 1
+
+    def statements(self, tables: Optional[Set[str]] = None) -> Iterator[Tuple[str, str, str]]:
+        """
+        Yield (kind, table, statement) for CREATE TABLE and INSERT statements.
+        INSERTs into tables outside `tables` are skipped (None means all tables).
+        """
+        buffer: List[str] = []
+        keep = False
+        kind = table = None
+        in_string = False
+
+        with open_dump(self.path) as f:
+            for line in f:
+                if kind is None:
+                    match = INSERT_PATTERN.match(line)
+                    if match:
+                        kind, table = "insert", match.group(1)
+                        keep = tables is None or table in tables
+                    else:
+                        match = CREATE_TABLE_PATTERN.match(line)
+                        if not match:
+                            continue
+                        kind, table, keep = "create", match.group(1), True
+
+                if keep:
+                    buffer.append(line)
+                if self._quotes_toggle(line):
+                    in_string = not in_string
+                if in_string or not line.rstrip().endswith(';'):
+                    continue
+
+                if keep:
+                    yield kind, table, ''.join(buffer)
+                buffer = []
+                kind = table = None
+
+    def _parse_create(self, table: str, statement: str):
+        body = statement[statement.index('(') + 1:statement.rindex(')')]
+        columns, depth, current = [], 0, []
+        for char in body + ',':
+            if char == '(':
+                depth += 1
+            elif char == ')':
+                depth -= 1
+            if char == ',' and depth == 0:
+                definition = ''.join(current).strip()
+                current = []
+                if not definition:
+                    continue
+                name = definition.split()[0].strip('`"[]')
+                if name.upper() not in CONSTRAINT_KEYWORDS:
+                    columns.append(name)
+            else:
+                current.append(char)
+        self.columns[table] = columns
+
+    def _unescape(self, value: str) -> str:
+        value = value.replace("''", "'")
+        if self.backslash_escapes and '\\' in value:
+            value = re.sub(r'\\(.)', lambda m: BACKSLASH_ESCAPES.get(m.group(1), m.group(1)), value)
+        return value
+
+    def parse_values(self, statement: str) -> Iterator[tuple]:
+        """Yield each row tuple of an INSERT ... VALUES (...), (...); statement."""
+        values_match = VALUES_PATTERN.search(statement)
+        if values_match is None:
+            return
+        row = None
+        position = values_match.end()
+        while True:
+            match = self.token_pattern.match(statement, position)
+            if match is None:
+                if statement[position:].strip():
+                    raise ValueError(
+                        f"Unexpected token {statement[position:position + 40].strip()!r} at offset {position} "
+                        f"of {statement[:60].strip()!r}..."
+                    )
+                break
+            position = match.end()
+            punct = match.group('punct')
+            if punct == '(':
+                row = []
+            elif punct == ')':
+                yield tuple(row)
+                row = None
+            elif punct == ';':
+                break
+            elif row is None:
+                continue
+            elif match.group('string') is not None:
+                row.append(self._unescape(match.group('string')))
+            elif match.group('null') is not None:
+                row.append(None)
+            elif match.group('blob') is not None:
+                row.append(bytes.fromhex(match.group('blob')))
+            elif match.group('hex') is not None:
+                digits = match.group('hex')
+                row.append(bytes.fromhex(digits.zfill(len(digits) + len(digits) % 2)))
+            elif match.group('bits') is not None:
+                row.append(int(match.group('bits') or '0', 2))
+            elif match.group('boolean') is not None:
+                row.append(match.group('boolean').upper() == 'TRUE')
+            elif match.group('number') is not None:
+                number = match.group('number')
+                row.append(int(number) if re.fullmatch(r'[-+]?\d+', number) else float(number))
+
+    def rows(self, tables: Optional[Set[str]] = None) -> Iterator[Tuple[str, tuple]]:
+        """Yield (table, row) for every inserted row of the requested tables."""
+        for kind, table, statement in self.statements(tables):
+            if kind == "create":
+                self._parse_create(table, statement)
+            else:
+                for row in self.parse_values(statement):
+                    yield table, row
+
+    def route(self, sinks: Dict[str, Callable[[tuple], None]],
+              filters: Optional[Dict[str, RowFilter]] = None) -> Dict[str, int]:
+        """
+        Send rows of each table in `sinks` to its callable in a single pass over the dump.
+        A filter (column index, set of values) keeps only rows whose column is in the set.
+        Returns the number of rows routed per table.
+        """
+        filters = filters or {}
+        counts = {table: 0 for table in sinks}
+        for table, row in self.rows(set(sinks)):
+            row_filter = filters.get(table)
+            if row_filter is not None:
+                column, allowed = row_filter
+                if column >= len(row) or row[column] not in allowed:
+                    continue
+            sinks[table](row)
+            counts[table] += 1
+        return counts
+
+    def row_dicts(self, table: str, rows: Iterable[tuple]) -> List[dict]:
+        """Turn row tuples into dicts keyed by the columns of the table's CREATE TABLE."""
+        columns = self.columns.get(table, [])
+        return [dict(zip(columns, row)) if columns else list(row) for row in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Extract the fixes, cve, cwe_classification and repository rows for a set of CVEs "
+                    "from the CVEfixes SQL dump in one pass.",
+        epilog="Example: python sql_dump_reader.py CVEfixes_v1.0.8.sql.gz --fixes repos_fixes/filtered_fixes.json"
+    )
+    parser.add_argument("dump", help="Path to CVEfixes_vX.sql.gz (or an uncompressed .sql file).")
+    parser.add_argument(
+        "--fixes", default="repos_fixes/filtered_fixes.json",
+        help="JSON list of [cve_id, hash, repo_url] fixes whose CVEs and repositories to keep."
+    )
+    parser.add_argument("-o", "--output-dir", default=".", help="Directory for the extracted files.")
+    parser.add_argument("--backslash-escapes", action="store_true", help="Dump uses MySQL-style \\' escapes.")
+    args = parser.parse_args()
+
+    with open(args.fixes, 'r') as f:
+        wanted_fixes = json.load(f)
+    cve_ids = {fix[0] for fix in wanted_fixes}
+    repo_urls = {fix[2] for fix in wanted_fixes}
+
+    tables = {"fixes": [], "cve": [], "cwe_classification": [], "repository": []}
+    reader = SQLDumpReader(args.dump, args.backslash_escapes)
+    counts = reader.route(
+        {table: rows.append for table, rows in tables.items()},
+        {
+            "fixes": (0, cve_ids),
+            "cve": (0, cve_ids),
+            "cwe_classification": (0, cve_ids),
+            "repository": (0, repo_urls),
+        }
+    )
+    print(f"Rows extracted per table: {counts}")
+
+    def output(filename):
+        return f"{args.output_dir}/{filename}"
+
+    fixes = [list(row[:3]) for row in tables["fixes"]]
+    save_fixes_to_json(fixes, output("python_fixes.json"))
+    save_fixes_to_text(fixes, output("python_fixes.txt"))
+
+    cve_cwe_data = [row[:2] for row in tables["cwe_classification"]]
+    save_cve_cwe_data_to_json(cve_cwe_data, output("python_cve_cwe_data.json"))
+    save_cve_cwe_data_to_text(cve_cwe_data, output("python_cve_cwe_data.txt"))
+
+    repository_columns = reader.columns.get("repository", [])
+    name_index = repository_columns.index("repo_name") if "repo_name" in repository_columns else 1
+    repos = [(row[0], row[name_index]) for row in tables["repository"]]
+    save_repos_json(repos, output("python_repos.json"))
+    save_repos_text(repos, output("python_repos.txt"))
+
+    with open(output("python_vul_scores.json"), 'w') as f:
+        json.dump(reader.row_dicts("cve", tables["cve"]), f, indent=4)
+    print(f"CVE scores saved to {output('python_vul_scores.json')}")
+
+
+if __name__ == "__main__":
+    main()
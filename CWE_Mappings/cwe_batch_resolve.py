@@ -0,0 +1,137 @@
+import argparse
+import contextlib
+import json
+import math
+import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, List, Optional
+
+from cwe_get_pillar import get_cwe_pillar
+from cwe_hierarchy import CWEHierarchy
+from cwe_http_cache import open_response_cache, DEFAULT_TTL
+from cwe_pillar_memo import PILLAR_MEMO
+
+
+def read_cwe_ids(lines: Iterable[str]) -> Iterator[str]:
+    """Yield CWE IDs from lines of text; IDs may be comma or whitespace separated, '#' starts a comment."""
+    for line in lines:
+        for cwe_id in re.split(r"[,\s]+", line.split('#', 1)[0]):
+            if cwe_id:
+                yield cwe_id
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class ResolverMetrics:
+    def __init__(self, cache=None):
+        self.cache = cache
+        self.started_at = time.perf_counter()
+        self.latencies: List[float] = []
+        self.resolved = 0
+
+    def record(self, latency: float, pillar: Optional[str]):
+        self.latencies.append(latency)
+        if pillar:
+            self.resolved += 1
+
+    def report(self) -> dict:
+        elapsed = time.perf_counter() - self.started_at
+        latencies = sorted(self.latencies)
+        memo_lookups = PILLAR_MEMO.hits + PILLAR_MEMO.misses
+        return {
+            "lookups": len(latencies),
+            "resolved": self.resolved,
+            "elapsed_s": round(elapsed, 3),
+            "lookups_per_s": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+            "memo_hit_ratio": round(PILLAR_MEMO.hits / memo_lookups, 3) if memo_lookups else 0.0,
+            "http_cache_hit_ratio": round(self.cache.hit_ratio, 3) if self.cache is not None else None,
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        }
+
+
+def resolve_stream(cwe_ids: Iterable[str], workers: int = 8, hierarchy: Optional[CWEHierarchy] = None,
+                   cache=None, metrics: Optional[ResolverMetrics] = None) -> Iterator[dict]:
+    """
+    Resolve CWE IDs on a thread pool and yield results in input order as they complete.
+
+    At most workers * 4 lookups are in flight, so arbitrarily long inputs (e.g. stdin)
+    are streamed rather than loaded up front.
+    """
+    def resolve(cwe_id: str):
+        started_at = time.perf_counter()
+        pillar = get_cwe_pillar(cwe_id, hierarchy=hierarchy, cache=cache)
+        return cwe_id, pillar, time.perf_counter() - started_at
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for cwe_id in cwe_ids:
+            pending.append(executor.submit(resolve, cwe_id))
+            if len(pending) >= workers * 4:
+                yield _finish(pending.popleft(), metrics)
+        while pending:
+            yield _finish(pending.popleft(), metrics)
+
+
+def _finish(future, metrics: Optional[ResolverMetrics]) -> dict:
+    cwe_id, pillar, latency = future.result()
+    if metrics is not None:
+        metrics.record(latency, pillar)
+    return {"cwe_id": cwe_id, "pillar": pillar, "latency_ms": round(latency * 1000, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Resolve CWE IDs to their pillars in bulk and stream the results as JSONL.",
+        epilog="Example: python cwe_batch_resolve.py ids.txt --workers 16 --cache cwe_cache.sqlite -o pillars.jsonl"
+    )
+    parser.add_argument("input", nargs="?", default="-", help="File with CWE IDs, or '-' for stdin (default).")
+    parser.add_argument("-o", "--output", help="JSONL output file (default: stdout).")
+    parser.add_argument("-w", "--workers", type=int, default=8, help="Concurrent lookups (default: 8).")
+    parser.add_argument("--catalog", help="Offline CWE catalog to resolve against instead of the MITRE API.")
+    parser.add_argument("--cache", help="Response cache: *.sqlite/*.db file or a directory of gzipped JSON.")
+    parser.add_argument("--cache-ttl", type=float, default=DEFAULT_TTL, help="Cache entry lifetime in seconds.")
+    parser.add_argument(
+        "--progress-every", type=int, default=1000,
+        help="Print throughput metrics to stderr every N lookups (0 disables, default: 1000)."
+    )
+    args = parser.parse_args()
+
+    results_file = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    input_file = sys.stdin if args.input == "-" else open(args.input, 'r', encoding='utf-8')
+    cache = None
+    try:
+        # Keep loader and resolver diagnostics off the JSONL stream
+        with contextlib.redirect_stdout(sys.stderr):
+            hierarchy = CWEHierarchy.from_file(args.catalog) if args.catalog else None
+            cache = open_response_cache(args.cache, args.cache_ttl) if args.cache else None
+            metrics = ResolverMetrics(cache)
+            for count, result in enumerate(
+                resolve_stream(read_cwe_ids(input_file), args.workers, hierarchy, cache, metrics), start=1
+            ):
+                results_file.write(json.dumps(result) + "\n")
+                if args.progress_every and count % args.progress_every == 0:
+                    results_file.flush()
+                    print(f"Progress: {json.dumps(metrics.report())}")
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+        if results_file is not sys.stdout:
+            results_file.close()
+        if cache is not None:
+            cache.close()
+
+    print(f"Finished: {json.dumps(metrics.report())}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
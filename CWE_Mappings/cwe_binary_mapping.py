@@ -0,0 +1,185 @@
+import argparse
+import array
+import bisect
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from typing import Dict, List, Optional, Tuple
+from cwe_hierarchy import CWEHierarchy, normalize_cwe_id
+
+# Layout (little-endian): 8-byte magic, uint32 count, uint32 reserved, then four
+# parallel uint16 arrays of `count` entries: sorted CWE IDs, pillar, parent, depth.
+# 0 means "none" in the pillar and parent arrays.
+MAGIC = b"CWEMAP01"
+HEADER = struct.Struct("<8sII")
+ARRAY_NAMES = ("ids", "pillars", "parents", "depths")
+
+# (cwe_id, pillar_id, parent_id, depth) with bare integer IDs
+MappingRow = Tuple[int, int, int, int]
+
+
+def _cwe_number(cwe_id) -> int:
+    return int(normalize_cwe_id(cwe_id)) if cwe_id else 0
+
+
+def rows_from_hierarchy(hierarchy: CWEHierarchy) -> List[MappingRow]:
+    """Pillar, primary parent and depth below the pillar for every CWE in the catalog."""
+    rows = []
+    for cwe_id in hierarchy.abstractions:
+        parent_ids = hierarchy.parents.get(cwe_id) or []
+        if hierarchy.is_pillar(cwe_id):
+            pillar, depth = int(cwe_id), 0
+        else:
+            pillar = _cwe_number(hierarchy.get_pillar(cwe_id))
+            depth = 0
+            current_id = cwe_id
+            while pillar and int(current_id) != pillar and depth <= len(hierarchy.abstractions):
+                current_id = hierarchy.parents[current_id][0]
+                depth += 1
+        rows.append((int(cwe_id), pillar, int(parent_ids[0]) if parent_ids else 0, depth))
+    return rows
+
+
+def rows_from_json_mapping(mapping: Dict[str, str]) -> List[MappingRow]:
+    """Rows for a cwe_pillar_mapping.json dict; parent and depth are unknown (0) there."""
+    rows = {_cwe_number(cwe_id): (_cwe_number(cwe_id), _cwe_number(pillar), 0, 0) for cwe_id, pillar in mapping.items()}
+    # Pillars map to themselves, like the notebooks' cwe_pillar_mapping.update({pillar: pillar})
+    for pillar in {row[1] for row in rows.values()}:
+        rows.setdefault(pillar, (pillar, pillar, 0, 0))
+    return list(rows.values())
+
+
+def write_binary_mapping(rows: List[MappingRow], filename: str = "cwe_pillar_mapping.bin"):
+    """Write mapping rows to the binary format, replacing `filename` atomically."""
+    rows = sorted(rows)
+    columns = [array.array('H', (row[i] for row in rows)) for i in range(len(ARRAY_NAMES))]
+    if sys.byteorder != "little":
+        for column in columns:
+            column.byteswap()
+
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, temp_filename = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, len(rows), 0))
+            for column in columns:
+                column.tofile(f)
+        os.replace(temp_filename, filename)
+    except BaseException:
+        os.unlink(temp_filename)
+        raise
+    print(f"Binary mapping with {len(rows)} entries saved to {filename}")
+
+
+class MappedCWEMapping:
+    """
+    Read-only CWE mapping backed by an mmap of the binary file.
+
+    Opening is O(1): nothing is parsed, and worker processes that open the same
+    file share its pages through the OS page cache. Lookups binary-search the
+    sorted ID array.
+
+    Examples:
+        >>> with MappedCWEMapping('cwe_pillar_mapping.bin') as mapping:
+        ...     mapping['CWE-89']
+        'CWE-707'
+    """
+
+    def __init__(self, filename: str = "cwe_pillar_mapping.bin"):
+        self.file = open(filename, 'rb')
+        self.mmap = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, _ = HEADER.unpack_from(self.mmap, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{filename} is not a binary CWE mapping")
+
+        self._views = []
+        offset = HEADER.size
+        for name in ARRAY_NAMES:
+            raw = memoryview(self.mmap)[offset:offset + 2 * self.count]
+            self._views.append(raw)
+            if sys.byteorder == "little":
+                column = raw.cast('H')
+                self._views.append(column)
+            else:
+                column = array.array('H', raw.tobytes())
+                column.byteswap()
+            setattr(self, name, column)
+            offset += 2 * self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        for name in ARRAY_NAMES:
+            if hasattr(self, name):
+                delattr(self, name)
+        for view in reversed(getattr(self, "_views", [])):
+            view.release()
+        self._views = []
+        self.mmap.close()
+        self.file.close()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _index(self, cwe_id) -> Optional[int]:
+        try:
+            number = _cwe_number(cwe_id)
+        except ValueError:
+            return None
+        i = bisect.bisect_left(self.ids, number)
+        if i < self.count and self.ids[i] == number:
+            return i
+        return None
+
+    def __contains__(self, cwe_id) -> bool:
+        return self._index(cwe_id) is not None
+
+    def pillar(self, cwe_id) -> Optional[str]:
+        i = self._index(cwe_id)
+        return f"CWE-{self.pillars[i]}" if i is not None and self.pillars[i] else None
+
+    def parent(self, cwe_id) -> Optional[str]:
+        i = self._index(cwe_id)
+        return f"CWE-{self.parents[i]}" if i is not None and self.parents[i] else None
+
+    def depth(self, cwe_id) -> Optional[int]:
+        i = self._index(cwe_id)
+        return self.depths[i] if i is not None else None
+
+    def get(self, cwe_id, default=None) -> Optional[str]:
+        pillar = self.pillar(cwe_id)
+        return pillar if pillar is not None else default
+
+    def __getitem__(self, cwe_id) -> str:
+        pillar = self.pillar(cwe_id)
+        if pillar is None:
+            raise KeyError(cwe_id)
+        return pillar
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a CWE pillar mapping to the binary mmap format.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--mapping", help="cwe_pillar_mapping.json to convert.")
+    source.add_argument("--catalog", help="Offline CWE catalog; also records parent and depth.")
+    parser.add_argument("-o", "--output", default="cwe_pillar_mapping.bin", help="Output binary file.")
+    args = parser.parse_args()
+
+    if args.catalog:
+        rows = rows_from_hierarchy(CWEHierarchy.from_file(args.catalog))
+    else:
+        with open(args.mapping, 'r') as f:
+            rows = rows_from_json_mapping(json.load(f))
+    write_binary_mapping(rows, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+from typing import Dict, FrozenSet, List
+from cwe_hierarchy import CWEHierarchy, normalize_cwe_id
+
+EMPTY = frozenset()
+
+
+class CWEClosureIndex:
+    """
+    Precomputed transitive closure of the CWE hierarchy.
+
+    Every CWE gets a bit position and an ancestor bitset (a Python int) built
+    over all parent paths, not just the first one. Ancestors grouped by
+    abstraction are materialized up front, so pillar/class/base lookups and
+    ancestry tests during scoring are a single dict access or bit test.
+
+    Examples:
+        >>> index = CWEClosureIndex.from_hierarchy(CWEHierarchy.from_file('1000.csv'))
+        >>> index.pillars('CWE-89')
+        frozenset({'CWE-707'})
+        >>> index.is_ancestor('CWE-707', 'CWE-89')
+        True
+    """
+
+    def __init__(self, hierarchy: CWEHierarchy):
+        self.ids: List[str] = sorted(hierarchy.abstractions, key=int)
+        self.position: Dict[str, int] = {cwe_id: i for i, cwe_id in enumerate(self.ids)}
+        self.ancestor_bits: Dict[str, int] = {}
+        self.abstraction_masks: Dict[str, int] = {}
+        self.by_abstraction: Dict[str, Dict[str, FrozenSet[str]]] = {}
+
+        for cwe_id, abstraction in hierarchy.abstractions.items():
+            bit = 1 << self.position[cwe_id]
+            self.abstraction_masks[abstraction] = self.abstraction_masks.get(abstraction, 0) | bit
+
+        for cwe_id in self.ids:
+            self._closure(cwe_id, hierarchy.parents, set())
+
+        for abstraction, mask in self.abstraction_masks.items():
+            self.by_abstraction[abstraction] = {
+                cwe_id: frozenset(self._bits_to_ids(bits & mask))
+                for cwe_id, bits in self.ancestor_bits.items()
+                if bits & mask
+            }
+
+    @classmethod
+    def from_hierarchy(cls, hierarchy: CWEHierarchy) -> "CWEClosureIndex":
+        return cls(hierarchy)
+
+    def _closure(self, cwe_id: str, parents: Dict[str, List[str]], in_progress: set) -> int:
+        if cwe_id in self.ancestor_bits:
+            return self.ancestor_bits[cwe_id]
+        if cwe_id in in_progress:
+            # Cycle in the catalog, stop here and let the outer call finish
+            return 0
+        in_progress.add(cwe_id)
+        bits = 0
+        for parent_id in parents.get(cwe_id, []):
+            if parent_id not in self.position:
+                continue
+            bits |= (1 << self.position[parent_id]) | self._closure(parent_id, parents, in_progress)
+        in_progress.discard(cwe_id)
+        self.ancestor_bits[cwe_id] = bits
+        return bits
+
+    def _bits_to_ids(self, bits: int) -> List[str]:
+        ids = []
+        while bits:
+            low = bits & -bits
+            ids.append(f"CWE-{self.ids[low.bit_length() - 1]}")
+            bits ^= low
+        return ids
+
+    def ancestors(self, cwe_id) -> FrozenSet[str]:
+        return frozenset(self._bits_to_ids(self.ancestor_bits.get(normalize_cwe_id(cwe_id), 0)))
+
+    def ancestors_of_abstraction(self, cwe_id, abstraction: str) -> FrozenSet[str]:
+        return self.by_abstraction.get(abstraction, {}).get(normalize_cwe_id(cwe_id), EMPTY)
+
+    def pillars(self, cwe_id) -> FrozenSet[str]:
+        """Every pillar above a CWE; a pillar maps to itself."""
+        normalized_id = normalize_cwe_id(cwe_id)
+        position = self.position.get(normalized_id)
+        if position is not None and self.abstraction_masks.get("Pillar", 0) >> position & 1:
+            return frozenset({f"CWE-{normalized_id}"})
+        return self.ancestors_of_abstraction(normalized_id, "Pillar")
+
+    def classes(self, cwe_id) -> FrozenSet[str]:
+        return self.ancestors_of_abstraction(cwe_id, "Class")
+
+    def bases(self, cwe_id) -> FrozenSet[str]:
+        return self.ancestors_of_abstraction(cwe_id, "Base")
+
+    def is_ancestor(self, ancestor_id, cwe_id) -> bool:
+        position = self.position.get(normalize_cwe_id(ancestor_id))
+        if position is None:
+            return False
+        return bool(self.ancestor_bits.get(normalize_cwe_id(cwe_id), 0) >> position & 1)
+
+    def related(self, cwe_a, cwe_b) -> bool:
+        """True when one CWE is the other or one of its ancestors."""
+        a, b = normalize_cwe_id(cwe_a), normalize_cwe_id(cwe_b)
+        return a == b or self.is_ancestor(a, b) or self.is_ancestor(b, a)
+
+    def shares_pillar(self, cwe_a, cwe_b) -> bool:
+        """True when two CWEs have at least one pillar in common."""
+        return not self.pillars(cwe_a).isdisjoint(self.pillars(cwe_b))
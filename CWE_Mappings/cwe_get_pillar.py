@@ -1,12 +1,23 @@
 import requests
+import argparse
 from typing import Optional
+from cwe_hierarchy import CWEHierarchy
+from cwe_http_cache import CWE_API_URL, get_json, open_response_cache, DEFAULT_TTL
+from cwe_pillar_memo import PillarMemo, PILLAR_MEMO
 
-def get_cwe_pillar(cwe_id: str) -> Optional[str]:
+def get_cwe_pillar(cwe_id: str, hierarchy: Optional[CWEHierarchy] = None, cache=None,
+                   memo: Optional[PillarMemo] = PILLAR_MEMO) -> Optional[str]:
     """
     Get the pillar parent ID for a given CWE ID.
     
     Args:
         cwe_id (str): CWE ID in either format: '22' or 'CWE-22'
+        hierarchy (CWEHierarchy, optional): Offline catalog to resolve against
+            instead of walking the MITRE API one parent at a time
+        cache (optional): Response cache from cwe_http_cache.open_response_cache,
+            so repeated parent lookups are served from disk
+        memo (PillarMemo, optional): Pillar memo shared across calls; pass None
+            to walk the full chain every time
         
     Returns:
         Optional[str]: Pillar parent ID in 'CWE-XXX' format or None if not found
@@ -18,45 +29,28 @@ def get_cwe_pillar(cwe_id: str) -> Optional[str]:
         'CWE-669'
     """
     
+    if hierarchy is not None:
+        return hierarchy.get_pillar(cwe_id)
+
     # Normalize the CWE ID
     normalized_id = cwe_id.replace('CWE-', '') if isinstance(cwe_id, str) else str(cwe_id)
-    base_url = "https://cwe-api.mitre.org/api/v1"
-    visited_ids = set()  # Track visited IDs to prevent infinite loops
-    
+
+    def fetch_parent(current_id):
+        # Construct API URL and make the request (raises for bad status codes)
+        url = f"{CWE_API_URL}/cwe/{current_id}/parents?view=1000"
+        json_data = get_json(url, cache)
+
+        # Check if we got any data
+        if not json_data:
+            return None
+
+        # Extract parent information
+        return json_data[0]["Type"], str(json_data[0]["ID"])
+
     try:
-        current_id = normalized_id
-        
-        while True:
-            # Construct API URL
-            url = f"{base_url}/cwe/{current_id}/parents?view=1000"
-            
-            # Make API request
-            response = requests.get(url)
-            response.raise_for_status()  # Raise exception for bad status codes
-            json_data = response.json()
-            
-            # Check if we got any data
-            if not json_data:
-                return None
-            
-            # Extract parent information
-            parent_type = json_data[0]["Type"]
-            parent_id = str(json_data[0]["ID"])
-            
-            # If we found a pillar, return it
-            if parent_type == "pillar_weakness":
-                return f"CWE-{parent_id}"
-            
-            # Check for cycles
-            if parent_id in visited_ids:
-                return None
-            
-            # Add current ID to visited set
-            visited_ids.add(parent_id)
-            
-            # Move up to parent
-            current_id = parent_id
-            
+        # Walk up to the pillar, reusing and compressing chains resolved by earlier calls
+        return (memo if memo is not None else PillarMemo(maxsize=0)).resolve(normalized_id, fetch_parent)
+
     except requests.exceptions.RequestException as e:
         print(f"Error accessing CWE API: {e}")
         return None
@@ -65,6 +59,12 @@ def get_cwe_pillar(cwe_id: str) -> Optional[str]:
         return None
 
 def main():
+    parser = argparse.ArgumentParser(description="Look up CWE pillars for a few sample IDs.")
+    parser.add_argument("--cache", help="Response cache: *.sqlite/*.db file or a directory of gzipped JSON.")
+    parser.add_argument("--cache-ttl", type=float, default=DEFAULT_TTL, help="Cache entry lifetime in seconds.")
+    args = parser.parse_args()
+    cache = open_response_cache(args.cache, args.cache_ttl) if args.cache else None
+
     # Test cases
     test_cases = [
         "22",
@@ -80,7 +80,7 @@ def main():
     print("-" * 40)
     
     for cwe in test_cases:
-        pillar = get_cwe_pillar(cwe)
+        pillar = get_cwe_pillar(cwe, cache=cache)
         print(f"Input: {cwe:10} → Pillar: {pillar if pillar else 'Not found'}")
 
 if __name__ == "__main__":
@@ -0,0 +1,205 @@
+import csv
+import io
+import os
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from collections import deque
+from typing import Dict, List, Optional, Set
+
+# Research Concepts view, the same view the MITRE API walks with ?view=1000
+RESEARCH_VIEW_ID = "1000"
+
+# Map catalog abstraction names to the "Type" values returned by the CWE API
+ABSTRACTION_TO_TYPE = {
+    "Pillar": "pillar_weakness",
+    "Class": "class_weakness",
+    "Base": "base_weakness",
+    "Variant": "variant_weakness",
+    "Compound": "compound_element",
+}
+
+RELATED_WEAKNESS_PATTERN = re.compile(
+    r"NATURE:(?P<nature>[^:]+):CWE ID:(?P<cwe_id>\d+):VIEW ID:(?P<view_id>\d+)(?::ORDINAL:(?P<ordinal>[^:]+))?"
+)
+
+
+def normalize_cwe_id(cwe_id) -> str:
+    """Normalize 'CWE-22', '22' or 22 to the bare numeric string '22'."""
+    return cwe_id.replace('CWE-', '') if isinstance(cwe_id, str) else str(cwe_id)
+
+
+class CWEHierarchy:
+    """
+    In-memory parent/child graph of the CWE Research Concepts view (View-1000).
+
+    The graph is loaded once from the official catalog download, either the XML
+    file (cwec_vX.Y.xml, optionally still zipped) or the View-1000 CSV export
+    (1000.csv), and answers pillar, ancestor and descendant queries without any
+    network access.
+
+    Examples:
+        >>> hierarchy = CWEHierarchy.from_file('cwec_v4.14.xml.zip')
+        >>> hierarchy.get_pillar('CWE-22')
+        'CWE-664'
+    """
+
+    def __init__(self, view_id: str = RESEARCH_VIEW_ID):
+        self.view_id = view_id
+        self.version = None
+        self.abstractions: Dict[str, str] = {}
+        self.names: Dict[str, str] = {}
+        self.statuses: Dict[str, str] = {}
+        # Parents are kept in catalog order with the primary parent first
+        self.parents: Dict[str, List[str]] = {}
+        self.children: Dict[str, List[str]] = {}
+
+    @classmethod
+    def from_file(cls, path: str, view_id: str = RESEARCH_VIEW_ID) -> "CWEHierarchy":
+        """Load the hierarchy from a catalog XML, XML zip or View-1000 CSV file."""
+        hierarchy = cls(view_id)
+        if zipfile.is_zipfile(path):
+            with zipfile.ZipFile(path) as archive:
+                member = next(
+                    name for name in archive.namelist() if name.endswith(('.xml', '.csv'))
+                )
+                with archive.open(member) as f:
+                    if member.endswith('.xml'):
+                        hierarchy._load_xml(f)
+                    else:
+                        hierarchy._load_csv(io.TextIOWrapper(f, encoding='utf-8'))
+        elif path.endswith('.csv'):
+            with open(path, 'r', newline='', encoding='utf-8') as f:
+                hierarchy._load_csv(f)
+        else:
+            with open(path, 'rb') as f:
+                hierarchy._load_xml(f)
+        hierarchy._build_children()
+        print(f"Loaded {len(hierarchy.abstractions)} weaknesses from {os.path.basename(path)}")
+        return hierarchy
+
+    def _add_weakness(self, cwe_id: str, name: str, abstraction: str, status: str, parents: List[tuple]):
+        # parents is a list of (cwe_id, ordinal); primary parents go first
+        self.abstractions[cwe_id] = abstraction
+        self.names[cwe_id] = name
+        self.statuses[cwe_id] = status
+        ordered = [pid for pid, ordinal in parents if ordinal == "Primary"]
+        ordered += [pid for pid, ordinal in parents if ordinal != "Primary" and pid not in ordered]
+        self.parents[cwe_id] = ordered
+
+    def _load_xml(self, f):
+        # iterparse keeps memory flat; the full catalog is tens of megabytes
+        for _, elem in ET.iterparse(f, events=("end",)):
+            tag = elem.tag.rsplit('}', 1)[-1]
+            if tag == "Weakness_Catalog":
+                self.version = elem.get("Version")
+            elif tag == "Weakness":
+                parents = []
+                for related in elem.iter():
+                    if related.tag.rsplit('}', 1)[-1] != "Related_Weakness":
+                        continue
+                    if related.get("Nature") == "ChildOf" and related.get("View_ID") == self.view_id:
+                        parents.append((related.get("CWE_ID"), related.get("Ordinal")))
+                self._add_weakness(
+                    elem.get("ID"), elem.get("Name"), elem.get("Abstraction"), elem.get("Status"), parents
+                )
+                elem.clear()
+            elif tag in ("Categories", "Views", "External_References"):
+                elem.clear()
+
+    def _load_csv(self, f):
+        for row in csv.DictReader(f):
+            parents = []
+            for match in RELATED_WEAKNESS_PATTERN.finditer(row.get("Related Weaknesses") or ""):
+                if match.group("nature") == "ChildOf" and match.group("view_id") == self.view_id:
+                    parents.append((match.group("cwe_id"), match.group("ordinal")))
+            self._add_weakness(
+                row["CWE-ID"], row.get("Name"), row.get("Weakness Abstraction"), row.get("Status"), parents
+            )
+
+    def _build_children(self):
+        self.children = {cwe_id: [] for cwe_id in self.parents}
+        for cwe_id, parent_ids in self.parents.items():
+            for parent_id in parent_ids:
+                self.children.setdefault(parent_id, []).append(cwe_id)
+
+    def __contains__(self, cwe_id) -> bool:
+        return normalize_cwe_id(cwe_id) in self.abstractions
+
+    def __len__(self) -> int:
+        return len(self.abstractions)
+
+    def weakness_ids(self, include_deprecated: bool = False) -> List[str]:
+        """All weakness IDs in the view, numerically sorted, in 'CWE-XXX' format."""
+        ids = [
+            cwe_id for cwe_id, status in self.statuses.items()
+            if include_deprecated or status != "Deprecated"
+        ]
+        return [f"CWE-{cwe_id}" for cwe_id in sorted(ids, key=int)]
+
+    def get_type(self, cwe_id) -> Optional[str]:
+        """Return the API-style type (e.g. 'pillar_weakness') of a CWE ID."""
+        return ABSTRACTION_TO_TYPE.get(self.abstractions.get(normalize_cwe_id(cwe_id)))
+
+    def is_pillar(self, cwe_id) -> bool:
+        return self.abstractions.get(normalize_cwe_id(cwe_id)) == "Pillar"
+
+    def get_parents(self, cwe_id) -> List[str]:
+        return [f"CWE-{pid}" for pid in self.parents.get(normalize_cwe_id(cwe_id), [])]
+
+    def get_children(self, cwe_id) -> List[str]:
+        return [f"CWE-{cid}" for cid in self.children.get(normalize_cwe_id(cwe_id), [])]
+
+    def _walk(self, cwe_id, edges: Dict[str, List[str]]) -> Set[str]:
+        start = normalize_cwe_id(cwe_id)
+        seen = set()
+        queue = deque(edges.get(start, []))
+        while queue:
+            current = queue.popleft()
+            if current in seen or current == start:
+                continue
+            seen.add(current)
+            queue.extend(edges.get(current, []))
+        return seen
+
+    def get_ancestors(self, cwe_id) -> Set[str]:
+        """Every ancestor of a CWE along all parent paths, in 'CWE-XXX' format."""
+        return {f"CWE-{pid}" for pid in self._walk(cwe_id, self.parents)}
+
+    def get_descendants(self, cwe_id) -> Set[str]:
+        """Every descendant of a CWE, in 'CWE-XXX' format."""
+        return {f"CWE-{cid}" for cid in self._walk(cwe_id, self.children)}
+
+    def get_pillar(self, cwe_id) -> Optional[str]:
+        """
+        Follow the primary parent chain up to the pillar, like get_cwe_pillar does
+        against the API. Returns None for pillars themselves and unknown IDs.
+        """
+        current_id = normalize_cwe_id(cwe_id)
+        visited = set()
+        while True:
+            parent_ids = self.parents.get(current_id)
+            if not parent_ids:
+                return None
+            parent_id = parent_ids[0]
+            if self.abstractions.get(parent_id) == "Pillar":
+                return f"CWE-{parent_id}"
+            if parent_id in visited:
+                return None
+            visited.add(parent_id)
+            current_id = parent_id
+
+    def get_pillars(self, cwe_id) -> Set[str]:
+        """All pillars reachable from a CWE through any of its parents."""
+        return {pid for pid in self.get_ancestors(cwe_id) if self.is_pillar(pid)}
+
+    def build_pillar_mapping(self, start: int = 1, end: int = 2000) -> Dict[str, str]:
+        """Offline equivalent of CWEHierarchyAnalyzer.build_pillar_mapping."""
+        mapping = {}
+        for cwe_id in sorted(self.parents, key=int):
+            if not start <= int(cwe_id) <= end:
+                continue
+            pillar_parent = self.get_pillar(cwe_id)
+            if pillar_parent:
+                mapping[f"CWE-{cwe_id}"] = pillar_parent
+        return mapping
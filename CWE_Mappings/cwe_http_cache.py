@@ -0,0 +1,204 @@
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import NamedTuple, Optional
+
+import requests
+
+CWE_API_URL = "https://cwe-api.mitre.org/api/v1"
+# CWE parent lists only change with catalog releases, a week is a safe default
+DEFAULT_TTL = 7 * 24 * 3600
+# 404s (IDs that do not exist or are categories) are remembered for a day
+DEFAULT_NEGATIVE_TTL = 24 * 3600
+
+
+class CachedResponse(NamedTuple):
+    body: object
+    etag: Optional[str]
+    fetched_at: float
+    # 404 for a negative entry, which has no body
+    status: int = 200
+
+
+class ResponseCacheStats:
+    """Counters shared by the cache backends, used for hit-ratio reporting."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        # get_json runs in asyncio.to_thread workers, so counting must be thread-safe
+        self.stats_lock = threading.Lock()
+
+    def count(self, counter: str):
+        with self.stats_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def ttl_for(self, entry: CachedResponse) -> float:
+        return self.negative_ttl if entry.status == 404 else self.ttl
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses + self.revalidated
+        return (self.hits + self.revalidated) / total if total else 0.0
+
+
+class SQLiteResponseCache(ResponseCacheStats):
+    """Response cache stored in a single SQLite file, keyed by URL."""
+
+    def __init__(self, path: str, ttl: float = DEFAULT_TTL, negative_ttl: float = DEFAULT_NEGATIVE_TTL):
+        super().__init__()
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "url TEXT PRIMARY KEY, body TEXT NOT NULL, etag TEXT, fetched_at REAL NOT NULL, "
+            "status INTEGER NOT NULL DEFAULT 200)"
+        )
+        columns = [row[1] for row in self.connection.execute("PRAGMA table_info(responses)")]
+        if "status" not in columns:
+            # Cache files written before negative entries existed
+            self.connection.execute("ALTER TABLE responses ADD COLUMN status INTEGER NOT NULL DEFAULT 200")
+        self.connection.commit()
+
+    def get(self, url: str) -> Optional[CachedResponse]:
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT body, etag, fetched_at, status FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return CachedResponse(json.loads(row[0]), row[1], row[2], row[3])
+
+    def set(self, url: str, body, etag: Optional[str], status: int = 200):
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses (url, body, etag, fetched_at, status) VALUES (?, ?, ?, ?, ?)",
+                (url, json.dumps(body), etag, time.time(), status)
+            )
+            self.connection.commit()
+
+    def touch(self, url: str):
+        with self.lock:
+            self.connection.execute("UPDATE responses SET fetched_at = ? WHERE url = ?", (time.time(), url))
+            self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+
+class DirectoryResponseCache(ResponseCacheStats):
+    """Response cache stored as one gzip-compressed JSON file per URL."""
+
+    def __init__(self, path: str, ttl: float = DEFAULT_TTL, negative_ttl: float = DEFAULT_NEGATIVE_TTL):
+        super().__init__()
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        os.makedirs(path, exist_ok=True)
+
+    def _file_for(self, url: str) -> str:
+        return os.path.join(self.path, hashlib.sha256(url.encode('utf-8')).hexdigest() + ".json.gz")
+
+    def get(self, url: str) -> Optional[CachedResponse]:
+        try:
+            with gzip.open(self._file_for(url), 'rt', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (FileNotFoundError, OSError, json.JSONDecodeError):
+            return None
+        return CachedResponse(entry["body"], entry.get("etag"), entry["fetched_at"], entry.get("status", 200))
+
+    def set(self, url: str, body, etag: Optional[str], status: int = 200, fetched_at: Optional[float] = None):
+        filename = self._file_for(url)
+        temp_filename = f"{filename}.{os.getpid()}.{threading.get_ident()}.tmp"
+        entry = {"url": url, "body": body, "etag": etag, "fetched_at": fetched_at or time.time(), "status": status}
+        with gzip.open(temp_filename, 'wt', encoding='utf-8') as f:
+            json.dump(entry, f)
+        os.replace(temp_filename, filename)
+
+    def touch(self, url: str):
+        entry = self.get(url)
+        if entry is not None:
+            self.set(url, entry.body, entry.etag, entry.status)
+
+    def close(self):
+        pass
+
+
+def open_response_cache(path: str, ttl: float = DEFAULT_TTL, negative_ttl: float = DEFAULT_NEGATIVE_TTL):
+    """Open a SQLite cache for *.sqlite/*.db paths, otherwise a directory cache."""
+    if path.endswith(('.sqlite', '.sqlite3', '.db')):
+        return SQLiteResponseCache(path, ttl, negative_ttl)
+    return DirectoryResponseCache(path, ttl, negative_ttl)
+
+
+def not_found_error(url: str) -> requests.exceptions.HTTPError:
+    """The HTTPError a cached 404 is replayed as, like the one raise_for_status raised originally."""
+    response = requests.models.Response()
+    response.status_code = 404
+    response.url = url
+    response.reason = "Not Found"
+    return requests.exceptions.HTTPError(f"404 Client Error: Not Found (cached) for url: {url}", response=response)
+
+
+# get_fresh_json's result when a request is needed
+MISSING = object()
+
+
+def get_fresh_json(url: str, cache=None):
+    """
+    The body of a fresh cache entry (counted as a hit), without any request; a fresh
+    cached 404 is raised as not_found_error. MISSING if there is no fresh entry.
+    """
+    if cache is None:
+        return MISSING
+    entry = cache.get(url)
+    if entry is None or time.time() - entry.fetched_at >= cache.ttl_for(entry):
+        return MISSING
+    cache.count("hits")
+    if entry.status == 404:
+        raise not_found_error(url)
+    return entry.body
+
+
+def get_json(url: str, cache=None, session=None, timeout: float = 30):
+    """
+    GET a JSON document through an optional response cache.
+
+    Fresh entries (younger than the cache TTL) are returned without any request.
+    Stale entries are revalidated with If-None-Match, and a 304 refreshes them
+    in place. Non-2xx responses raise requests.exceptions.HTTPError; 404s are
+    cached too (for the cache's negative TTL) and replayed as the same error.
+    """
+    http = session or requests
+    if cache is None:
+        response = http.get(url, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+
+    body = get_fresh_json(url, cache)
+    if body is not MISSING:
+        return body
+
+    entry = cache.get(url)
+    headers = {"If-None-Match": entry.etag} if entry is not None and entry.etag else {}
+    response = http.get(url, headers=headers, timeout=timeout)
+    if response.status_code == 304 and entry is not None:
+        cache.count("revalidated")
+        cache.touch(url)
+        return entry.body
+
+    if response.status_code == 404:
+        cache.count("misses")
+        cache.set(url, None, None, status=404)
+    response.raise_for_status()
+    body = response.json()
+    cache.count("misses")
+    cache.set(url, body, response.headers.get("ETag"))
+    return body
@@ -0,0 +1,145 @@
+import threading
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Generator, Optional, Tuple
+
+from cwe_http_cache import CWE_API_URL
+
+# fetch_parent(cwe_id) returns (parent_type, parent_id) of the first parent, or None at the top
+FetchParent = Callable[[str], Optional[Tuple[str, str]]]
+FetchParentAsync = Callable[[str], Awaitable[Optional[Tuple[str, str]]]]
+
+
+class PillarMemo:
+    """
+    Process-wide memo of resolved pillars with union-find style path compression.
+
+    Every CWE on a walked parent chain resolves to the same pillar, so once a
+    walk finishes all intermediate nodes are stored pointing straight at the
+    result. Resolving CWE-564 after CWE-89 then stops as soon as it reaches a
+    node that is already known. Entries are evicted least recently used first.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self.entries: "OrderedDict[str, Optional[str]]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _lookup(self, cwe_id: str) -> Tuple[bool, Optional[str]]:
+        with self.lock:
+            if cwe_id not in self.entries:
+                return False, None
+            self.entries.move_to_end(cwe_id)
+            return True, self.entries[cwe_id]
+
+    def _lookup_counted(self, cwe_id: str) -> Tuple[bool, Optional[str]]:
+        """Lookup of the requested ID, counted as a hit or miss."""
+        with self.lock:
+            if cwe_id not in self.entries:
+                self.misses += 1
+                return False, None
+            self.hits += 1
+            self.entries.move_to_end(cwe_id)
+            return True, self.entries[cwe_id]
+
+    def _store(self, cwe_ids, pillar: Optional[str]):
+        if self.maxsize <= 0:
+            return
+        with self.lock:
+            for cwe_id in cwe_ids:
+                self.entries[cwe_id] = pillar
+                self.entries.move_to_end(cwe_id)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def _walk(self, cwe_id: str) -> Generator[str, Optional[Tuple[str, str]], Optional[str]]:
+        """
+        Walk from cwe_id up to its pillar. Yields each ID whose parent is needed and
+        expects (parent_type, parent_id) or None sent back; returns the pillar. Shared
+        by resolve and resolve_async, which only differ in how the parent is fetched.
+        """
+        found, pillar = self._lookup_counted(cwe_id)
+        if found:
+            return pillar
+
+        path = []
+        visited = set()
+        current_id = cwe_id
+        while True:
+            path.append(current_id)
+            parent = yield current_id
+            if parent is None:
+                pillar = None
+                break
+
+            parent_type, parent_id = parent
+            if parent_type == "pillar_weakness":
+                pillar = f"CWE-{parent_id}"
+                break
+
+            # Check for cycles
+            if parent_id in visited:
+                pillar = None
+                break
+            visited.add(parent_id)
+
+            found, pillar = self._lookup(parent_id)
+            if found:
+                break
+            current_id = parent_id
+
+        self._store(path, pillar)
+        return pillar
+
+    def resolve(self, cwe_id: str, fetch_parent: FetchParent) -> Optional[str]:
+        """
+        Resolve the pillar of a bare CWE ID, calling fetch_parent only for nodes
+        that are not memoized yet. Errors raised by fetch_parent propagate and
+        leave the memo untouched.
+        """
+        walk = self._walk(cwe_id)
+        try:
+            current_id = next(walk)
+            while True:
+                current_id = walk.send(fetch_parent(current_id))
+        except StopIteration as done:
+            return done.value
+
+    async def resolve_async(self, cwe_id: str, fetch_parent: FetchParentAsync) -> Optional[str]:
+        """resolve for the async crawler: fetch_parent is a coroutine function."""
+        walk = self._walk(cwe_id)
+        try:
+            current_id = next(walk)
+            while True:
+                current_id = walk.send(await fetch_parent(current_id))
+        except StopIteration as done:
+            return done.value
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+_MEMOS: Dict[str, PillarMemo] = {}
+_MEMOS_LOCK = threading.Lock()
+
+
+def memo_for(base_url: str) -> PillarMemo:
+    """
+    The memo shared by every resolver walking the same API, keyed by its base URL,
+    so a stub server or alternate catalog never sees pillars resolved against another.
+    """
+    with _MEMOS_LOCK:
+        if base_url not in _MEMOS:
+            _MEMOS[base_url] = PillarMemo()
+        return _MEMOS[base_url]
+
+
+# Shared by get_cwe_pillar and CWEHierarchyAnalyzer on the MITRE API
+PILLAR_MEMO = memo_for(CWE_API_URL)
@@ -1,71 +1,365 @@
 import requests
 import json
-from typing import Dict, Optional
+import os
+import tempfile
+import argparse
+import asyncio
+import time
+from typing import Dict, Iterable, List, Optional
+from cwe_hierarchy import CWEHierarchy
+from cwe_http_cache import CWE_API_URL, MISSING, get_fresh_json, get_json, open_response_cache, DEFAULT_TTL
+from cwe_pillar_memo import PillarMemo, memo_for
+
+# Status codes worth retrying: rate limiting and transient server errors
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class MalformedResponseError(requests.exceptions.RequestException):
+    """The API answered, but not with the JSON structure the caller expects."""
+
+
+class TokenBucket:
+    """Async token-bucket rate limiter allowing `rate` requests per second with bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
 
 class CWEHierarchyAnalyzer:
-    def __init__(self):
-        self.base_url = "https://cwe-api.mitre.org/api/v1"
+    def __init__(self, base_url: str = CWE_API_URL, cache=None, memo: Optional[PillarMemo] = None):
+        self.base_url = base_url
+        # Optional on-disk response cache (see cwe_http_cache.open_response_cache)
+        self.cache = cache
+        # Resolved pillars, by default shared with every resolver of the same API (get_cwe_pillar
+        # for the MITRE API); pass PillarMemo(maxsize=0) to disable memoization
+        self.memo = memo if memo is not None else memo_for(base_url)
         self.pillar_mapping = {}
+        # Parent responses shared by every child in the async crawler, keyed by bare CWE ID
+        self.parents_cache: Dict[str, list] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
 
     def normalize_cwe_id(self, cwe_id: str) -> str:
         return cwe_id.replace('CWE-', '') if isinstance(cwe_id, str) else str(cwe_id)
 
+    def fetch_parent(self, cwe_id: str):
+        url = f"{self.base_url}/cwe/{cwe_id}/parents?view=1000"
+        json_data = get_json(url, self.cache)
+
+        if not json_data:
+            return None
+
+        return json_data[0]["Type"], str(json_data[0]["ID"])
+
     def get_pillar_parent(self, child_id: str) -> Optional[str]:
         try:
             child_id = self.normalize_cwe_id(child_id)
-            current_id = child_id
-            visited = set()
+            return self.memo.resolve(child_id, self.fetch_parent)
 
-            while True:
-                url = f"{self.base_url}/cwe/{current_id}/parents?view=1000"
-                response = requests.get(url)
-                response.raise_for_status()
-                json_data = response.json()
+        except requests.exceptions.RequestException as e:
+            print(f"Error fetching data for CWE-{child_id}: {e}")
+            return None
+
+    def discover_weakness_ids(self, hierarchy: Optional[CWEHierarchy] = None) -> List[int]:
+        """
+        List the real, non-deprecated weakness IDs, from an offline catalog when given
+        and otherwise from the API's weakness list, so the resolver never probes IDs
+        that do not exist or are categories. A payload of an unexpected shape raises
+        MalformedResponseError, a RequestException, just like a failed request.
+        """
+        if hierarchy is not None:
+            return [int(cwe_id[len("CWE-"):]) for cwe_id in hierarchy.weakness_ids()]
+        url = f"{self.base_url}/cwe/weakness/all"
+        json_data = get_json(url, self.cache)
+        weaknesses = json_data.get("Weaknesses") if isinstance(json_data, dict) else None
+        if not isinstance(weaknesses, list) or not weaknesses:
+            raise MalformedResponseError(f"Expected a non-empty 'Weaknesses' list from {url}")
+        cwe_ids = []
+        for weakness in weaknesses:
+            if not isinstance(weakness, dict) or not str(weakness.get("ID", "")).isdigit():
+                raise MalformedResponseError(f"Unexpected weakness entry from {url}: {weakness!r:.200}")
+            if weakness.get("Status") != "Deprecated":
+                cwe_ids.append(int(weakness["ID"]))
+        return sorted(cwe_ids)
+
+    def _ids_in_range(self, start: int, end: int, cwe_ids: Optional[Iterable[int]]) -> List[int]:
+        if cwe_ids is None:
+            return list(range(start, end + 1))
+        return [cwe_id for cwe_id in cwe_ids if start <= cwe_id <= end]
+
+    def build_pillar_mapping(self, start: int = 1, end: int = 2000,
+                             cwe_ids: Optional[Iterable[int]] = None) -> Dict[str, str]:
+        """Map every ID in [start, end] to its pillar; pass cwe_ids to resolve only known weaknesses."""
+        mapping = {}
+        for processed, cwe_id in enumerate(self._ids_in_range(start, end, cwe_ids), start=1):
+            pillar_parent = self.get_pillar_parent(str(cwe_id))
+            if pillar_parent:
+                mapping[f"CWE-{cwe_id}"] = pillar_parent
+            if processed % 100 == 0:
+                print(f"Processed up to CWE-{cwe_id}")
+        return mapping
 
-                if not json_data:
-                    return None
+    async def _request_parents(self, cwe_id: str, session, limiter: TokenBucket,
+                               semaphore: asyncio.Semaphore, retries: int, backoff: float) -> list:
+        url = f"{self.base_url}/cwe/{cwe_id}/parents?view=1000"
+        # Fresh cache entries cost no request, so they take neither a rate-limit token nor a slot
+        try:
+            json_data = await asyncio.to_thread(get_fresh_json, url, self.cache)
+        except requests.exceptions.HTTPError:
+            # Cached 404: unknown ID or category
+            return []
+        if json_data is not MISSING:
+            return json_data
+        async with semaphore:
+            for attempt in range(retries + 1):
+                await limiter.acquire()
+                try:
+                    return await asyncio.to_thread(get_json, url, self.cache, session)
+                except requests.exceptions.HTTPError as e:
+                    status_code = e.response.status_code if e.response is not None else None
+                    if status_code == 404:
+                        # Unknown ID or category, same outcome as an empty parent list
+                        return []
+                    if status_code not in RETRYABLE_STATUS_CODES:
+                        raise
+                    error = e
+                except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                    error = e
+                if attempt < retries:
+                    await asyncio.sleep(backoff * (2 ** attempt))
+            raise error
 
-                parent_type = json_data[0]["Type"]
-                parent_id = str(json_data[0]["ID"])
+    async def fetch_parents_async(self, cwe_id: str, session, limiter: TokenBucket,
+                                  semaphore: asyncio.Semaphore, retries: int = 3, backoff: float = 0.5) -> list:
+        """Fetch the parents of a CWE once; concurrent callers for the same ID share one request."""
+        if cwe_id in self.parents_cache:
+            return self.parents_cache[cwe_id]
+        task = self._inflight.get(cwe_id)
+        if task is None:
+            task = asyncio.ensure_future(
+                self._request_parents(cwe_id, session, limiter, semaphore, retries, backoff)
+            )
+            self._inflight[cwe_id] = task
+        try:
+            json_data = await task
+        finally:
+            self._inflight.pop(cwe_id, None)
+        self.parents_cache[cwe_id] = json_data
+        return json_data
 
-                if parent_type == "pillar_weakness":
-                    return f"CWE-{parent_id}"
+    async def get_pillar_parent_async(self, child_id: str, session, limiter: TokenBucket,
+                                      semaphore: asyncio.Semaphore, retries: int = 3) -> Optional[str]:
+        async def fetch_parent(cwe_id: str):
+            json_data = await self.fetch_parents_async(cwe_id, session, limiter, semaphore, retries)
 
-                if parent_id in visited:
-                    return None
+            if not json_data:
+                return None
 
-                visited.add(parent_id)
-                current_id = parent_id
+            return json_data[0]["Type"], str(json_data[0]["ID"])
+
+        try:
+            child_id = self.normalize_cwe_id(child_id)
+            return await self.memo.resolve_async(child_id, fetch_parent)
 
         except requests.exceptions.RequestException as e:
             print(f"Error fetching data for CWE-{child_id}: {e}")
             return None
 
-    def build_pillar_mapping(self, start: int = 1, end: int = 2000) -> Dict[str, str]:
+    async def build_pillar_mapping_async(self, start: int = 1, end: int = 2000, concurrency: int = 8,
+                                         rate: float = 10.0, retries: int = 3,
+                                         cwe_ids: Optional[Iterable[int]] = None) -> Dict[str, str]:
+        """
+        Crawl the API with at most `concurrency` requests in flight and `rate` requests per
+        second. Parent responses are memoized, so shared ancestor chains are fetched once.
+        """
+        limiter = TokenBucket(rate)
+        semaphore = asyncio.Semaphore(concurrency)
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        processed = 0
+
+        async def resolve(cwe_id: int):
+            nonlocal processed
+            pillar_parent = await self.get_pillar_parent_async(str(cwe_id), session, limiter, semaphore, retries)
+            processed += 1
+            if processed % 100 == 0:
+                print(f"Processed {processed} CWE IDs")
+            return cwe_id, pillar_parent
+
+        try:
+            results = await asyncio.gather(
+                *(resolve(cwe_id) for cwe_id in self._ids_in_range(start, end, cwe_ids))
+            )
+        finally:
+            session.close()
+
         mapping = {}
-        for cwe_id in range(start, end + 1):
-            pillar_parent = self.get_pillar_parent(str(cwe_id))
+        for cwe_id, pillar_parent in results:
             if pillar_parent:
                 mapping[f"CWE-{cwe_id}"] = pillar_parent
-            if cwe_id % 100 == 0:
-                print(f"Processed up to CWE-{cwe_id}")
         return mapping
 
+    def build_pillar_mapping_concurrent(self, start: int = 1, end: int = 2000, concurrency: int = 8,
+                                        rate: float = 10.0, retries: int = 3,
+                                        cwe_ids: Optional[Iterable[int]] = None) -> Dict[str, str]:
+        """Synchronous entry point for build_pillar_mapping_async."""
+        return asyncio.run(self.build_pillar_mapping_async(start, end, concurrency, rate, retries, cwe_ids))
+
+def write_json_atomically(data, filename: str):
+    """Write JSON to a temp file next to `filename` and rename it over the target."""
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, temp_filename = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=4)
+        os.replace(temp_filename, filename)
+    except BaseException:
+        os.unlink(temp_filename)
+        raise
+
 def save_mapping_to_file(mapping: Dict[str, str], filename: str = "cwe_pillar_mapping.json"):
     """Save the CWE mapping to a JSON file"""
-    with open(filename, 'w') as f:
-        json.dump(mapping, f, indent=4)
+    write_json_atomically(mapping, filename)
     print(f"Mapping saved to {filename}")
 
+def metadata_filename(filename: str) -> str:
+    return os.path.splitext(filename)[0] + ".meta.json"
+
+def save_mapping_metadata(hierarchy: CWEHierarchy, filename: str = "cwe_pillar_mapping.json"):
+    """Record the catalog version and ancestry snapshot the mapping was built from."""
+    metadata = {
+        "catalog_version": hierarchy.version,
+        "parents": hierarchy.parents,
+        "abstractions": hierarchy.abstractions,
+    }
+    write_json_atomically(metadata, metadata_filename(filename))
+
+def update_pillar_mapping(hierarchy: CWEHierarchy, filename: str = "cwe_pillar_mapping.json",
+                          start: int = 1, end: int = 2000, resolver=None) -> Dict[str, str]:
+    """
+    Refresh a saved mapping for a new catalog release.
+
+    The ancestry snapshot saved next to the mapping is diffed against the new
+    catalog; only CWEs whose parents or abstraction changed, plus everything
+    below them, are re-resolved. resolver defaults to the offline hierarchy but
+    can be e.g. CWEHierarchyAnalyzer().get_pillar_parent. Falls back to a full
+    rebuild when there is no saved snapshot.
+    """
+    resolver = resolver or hierarchy.get_pillar
+    try:
+        with open(filename, 'r') as f:
+            mapping = json.load(f)
+        with open(metadata_filename(filename), 'r') as f:
+            metadata = json.load(f)
+    except FileNotFoundError:
+        print("No saved mapping snapshot found, rebuilding the full mapping...")
+        mapping = hierarchy.build_pillar_mapping(start, end)
+        save_mapping_to_file(mapping, filename)
+        save_mapping_metadata(hierarchy, filename)
+        return mapping
+
+    if hierarchy.version is not None and metadata.get("catalog_version") == hierarchy.version:
+        print(f"Mapping is already up to date with catalog version {hierarchy.version}")
+        return mapping
+
+    old_parents = metadata.get("parents", {})
+    old_abstractions = metadata.get("abstractions", {})
+    changed = {
+        cwe_id for cwe_id in set(old_parents) | set(hierarchy.parents)
+        if old_parents.get(cwe_id) != hierarchy.parents.get(cwe_id)
+        or old_abstractions.get(cwe_id) != hierarchy.abstractions.get(cwe_id)
+    }
+    affected = set(changed)
+    for cwe_id in changed:
+        affected.update(descendant[len("CWE-"):] for descendant in hierarchy.get_descendants(cwe_id))
+
+    for cwe_id in sorted((cwe_id for cwe_id in affected if start <= int(cwe_id) <= end), key=int):
+        pillar_parent = resolver(cwe_id) if cwe_id in hierarchy.parents else None
+        if pillar_parent:
+            mapping[f"CWE-{cwe_id}"] = pillar_parent
+        else:
+            mapping.pop(f"CWE-{cwe_id}", None)
+    print(f"Re-resolved {len(affected)} CWE IDs affected by {len(changed)} ancestry changes "
+          f"({metadata.get('catalog_version')} -> {hierarchy.version})")
+
+    save_mapping_to_file(mapping, filename)
+    save_mapping_metadata(hierarchy, filename)
+    return mapping
+
 def main():
-    analyzer = CWEHierarchyAnalyzer()
-    
+    parser = argparse.ArgumentParser(description="Build the CWE to pillar mapping.")
+    parser.add_argument(
+        "--catalog",
+        help="Offline CWE catalog (cwec XML, XML zip or View-1000 CSV). Uses the MITRE API when omitted."
+    )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="With --catalog, only re-resolve CWEs whose ancestry changed since the saved mapping."
+    )
+    parser.add_argument("--start", type=int, default=1, help="First CWE ID to map (default: 1).")
+    parser.add_argument("--end", type=int, default=1500, help="Last CWE ID to map (default: 1500).")
+    parser.add_argument("-o", "--output", default="cwe_pillar_mapping.json", help="Output JSON file.")
+    parser.add_argument(
+        "--concurrency", type=int, default=1,
+        help="Concurrent API requests; values above 1 use the async crawler (default: 1)."
+    )
+    parser.add_argument("--rate", type=float, default=10.0, help="Max API requests per second for the crawler.")
+    parser.add_argument(
+        "--probe-range", action="store_true",
+        help="Probe every integer in [start, end] instead of discovering real weakness IDs first."
+    )
+    parser.add_argument("--cache", help="Response cache: *.sqlite/*.db file or a directory of gzipped JSON.")
+    parser.add_argument("--cache-ttl", type=float, default=DEFAULT_TTL, help="Cache entry lifetime in seconds.")
+    args = parser.parse_args()
+
+    if args.incremental and not args.catalog:
+        parser.error("--incremental needs --catalog to diff against")
+
     # Build mapping for range 1-1500 (or adjust range as needed)
     print("Building CWE pillar mapping...")
-    mapping = analyzer.build_pillar_mapping(1, 1500)
+    hierarchy = CWEHierarchy.from_file(args.catalog) if args.catalog else None
+    if args.incremental:
+        mapping = update_pillar_mapping(hierarchy, args.output, args.start, args.end)
+    elif hierarchy is not None:
+        mapping = hierarchy.build_pillar_mapping(args.start, args.end)
+    else:
+        cache = open_response_cache(args.cache, args.cache_ttl) if args.cache else None
+        analyzer = CWEHierarchyAnalyzer(cache=cache)
+        cwe_ids = None
+        if not args.probe_range:
+            try:
+                cwe_ids = analyzer.discover_weakness_ids()
+                print(f"Discovered {len(cwe_ids)} weakness IDs")
+            except requests.exceptions.RequestException as e:
+                print(f"Weakness discovery failed, probing the full range instead: {e}")
+        if args.concurrency > 1:
+            mapping = analyzer.build_pillar_mapping_concurrent(
+                args.start, args.end, args.concurrency, args.rate, cwe_ids=cwe_ids
+            )
+        else:
+            mapping = analyzer.build_pillar_mapping(args.start, args.end, cwe_ids)
     
-    # Save to JSON file
-    save_mapping_to_file(mapping)
+    # Save to JSON file (the incremental update already wrote it)
+    if not args.incremental:
+        save_mapping_to_file(mapping, args.output)
+        if hierarchy is not None:
+            save_mapping_metadata(hierarchy, args.output)
     
     # Print some statistics
     print(f"\nTotal mappings found: {len(mapping)}")
@@ -0,0 +1,88 @@
+import re
+from typing import Dict, Iterable
+
+import numpy as np
+import pandas as pd
+
+# Deprecated/Prohibited CWEs, skipped when scoring
+BAD_CWES = frozenset({"CWE-21", "CWE-264", "CWE-254", "CWE-255", "CWE-310", "CWE-19", "CWE-534", "CWE-730", "CWE-398"})
+
+# Accepts 'CWE-79', 'CWE-079', 'cwe-79' and tool suffixes such as 'CWE-79: Improper Neutralization'
+CWE_NUMBER_PATTERN = re.compile(r'^\s*CWE-0*(\d+)', re.IGNORECASE)
+
+
+def build_pillar_lookup(mapping) -> np.ndarray:
+    """
+    Build a dense lookup array where lookup[cwe_number] is the pillar number (0 = unknown).
+
+    mapping is either a cwe_pillar_mapping.json dict or a cwe_binary_mapping.MappedCWEMapping.
+    Pillars always map to themselves.
+    """
+    if hasattr(mapping, "ids") and hasattr(mapping, "pillars"):
+        ids = np.asarray(mapping.ids, dtype=np.int64)
+        pillars = np.asarray(mapping.pillars, dtype=np.int32)
+    else:
+        ids = np.fromiter((int(cwe_id.split('-')[-1]) for cwe_id in mapping), dtype=np.int64, count=len(mapping))
+        pillars = np.fromiter((int(pillar.split('-')[-1]) for pillar in mapping.values()), dtype=np.int32, count=len(mapping))
+
+    size = int(max(ids.max(initial=0), pillars.max(initial=0))) + 1
+    lookup = np.zeros(size, dtype=np.int32)
+    lookup[ids] = pillars
+    known_pillars = np.unique(pillars[pillars > 0])
+    lookup[known_pillars] = known_pillars
+    return lookup
+
+
+def normalize_cwe_numbers(values: Iterable) -> pd.Series:
+    """Parse CWE strings to nullable integers, stripping zero padding ('CWE-079' -> 79)."""
+    series = values if isinstance(values, pd.Series) else pd.Series(values)
+    numbers = series.astype("string").str.extract(CWE_NUMBER_PATTERN, expand=False)
+    return pd.to_numeric(numbers, errors="coerce").astype("Int64")
+
+
+def pillar_codes(values: Iterable, lookup: np.ndarray, bad_cwes: Iterable[str] = BAD_CWES) -> np.ndarray:
+    """
+    Map CWE strings to pillar numbers in one vectorized pass.
+
+    Unknown IDs, unparsable strings and CWEs in bad_cwes all map to 0.
+    """
+    numbers = normalize_cwe_numbers(values).to_numpy(dtype=np.int64, na_value=-1)
+    codes = np.zeros(len(numbers), dtype=np.int32)
+    in_range = (numbers >= 0) & (numbers < len(lookup))
+    codes[in_range] = lookup[numbers[in_range]]
+
+    bad_numbers = [int(match.group(1)) for match in map(CWE_NUMBER_PATTERN.match, bad_cwes) if match]
+    codes[np.isin(numbers, bad_numbers)] = 0
+    return codes
+
+
+def map_cwes_to_pillars(values: Iterable, mapping, bad_cwes: Iterable[str] = BAD_CWES) -> pd.Series:
+    """
+    Map a column of CWE strings to 'CWE-XXX' pillar labels (<NA> when unknown or deprecated).
+
+    mapping can be a prebuilt lookup array (see build_pillar_lookup), a mapping dict or
+    a MappedCWEMapping. The result is categorical, so it stays compact for large outputs.
+    """
+    lookup = mapping if isinstance(mapping, np.ndarray) else build_pillar_lookup(mapping)
+    codes = pillar_codes(values, lookup, bad_cwes)
+    index = values.index if isinstance(values, pd.Series) else None
+
+    categories = np.unique(codes[codes > 0])
+    category_codes = np.searchsorted(categories, codes)
+    category_codes[codes == 0] = -1
+    pillars = pd.Categorical.from_codes(category_codes, categories=[f"CWE-{code}" for code in categories])
+    return pd.Series(pillars, index=index, name="pillar")
+
+
+def findings_frame(tool_output: Dict[str, dict]) -> pd.DataFrame:
+    """
+    Flatten a formatted tool output ({example: {"detected_files_meta_data": [...]}})
+    into one row per reported CWE with example, file_path, severity and cwe columns.
+    """
+    records = [
+        (example, finding.get("file_path"), finding.get("severity"), cwe)
+        for example, metadata in tool_output.items()
+        for finding in metadata.get("detected_files_meta_data", [])
+        for cwe in finding.get("cwes", [])
+    ]
+    return pd.DataFrame.from_records(records, columns=["example", "file_path", "severity", "cwe"])
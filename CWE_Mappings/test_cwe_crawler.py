@@ -0,0 +1,112 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from cwe_http_cache import open_response_cache
+from cwe_pillar_memo import PillarMemo
+from cwe_save_mappings import CWEHierarchyAnalyzer
+
+
+class StubCWEServer:
+    """Local stand-in for the CWE API: every ID's parent is pillar CWE-664, 404 for IDs above `known`."""
+
+    def __init__(self, latency: float, known: int = 1000):
+        self.latency = latency
+        self.known = known
+        self.lock = threading.Lock()
+        self.inflight = 0
+        self.max_inflight = 0
+        self.started_at = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with stub.lock:
+                    stub.started_at.append(time.monotonic())
+                    stub.inflight += 1
+                    stub.max_inflight = max(stub.max_inflight, stub.inflight)
+                try:
+                    time.sleep(stub.latency)
+                    cwe_id = int(self.path.split("/")[2])
+                    if cwe_id > stub.known:
+                        self._send(404, {"message": "not found"})
+                    else:
+                        self._send(200, [{"Type": "pillar_weakness", "ID": 664}])
+                finally:
+                    with stub.lock:
+                        stub.inflight -= 1
+
+            def _send(self, status, body):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def test_crawler_respects_concurrency_cap():
+    with StubCWEServer(latency=0.05) as stub:
+        analyzer = CWEHierarchyAnalyzer(base_url=stub.base_url, memo=PillarMemo())
+        mapping = analyzer.build_pillar_mapping_concurrent(1, 40, concurrency=4, rate=1000.0)
+
+    assert mapping == {f"CWE-{cwe_id}": "CWE-664" for cwe_id in range(1, 41)}
+    assert len(stub.started_at) == 40
+    assert 1 < stub.max_inflight <= 4
+
+
+def test_crawler_respects_rate_limit():
+    rate = 40.0
+    with StubCWEServer(latency=0.01, known=70) as stub:
+        analyzer = CWEHierarchyAnalyzer(base_url=stub.base_url, memo=PillarMemo())
+        mapping = analyzer.build_pillar_mapping_concurrent(1, 80, concurrency=16, rate=rate)
+
+    # IDs above `known` are 404s: no pillar, but still requested once
+    assert len(mapping) == 70
+    started_at = sorted(stub.started_at)
+    assert len(started_at) == 80
+    # The token bucket allows a burst of `rate` requests, then `rate` per second
+    capacity = max(1.0, rate)
+    for count, started in enumerate(started_at, start=1):
+        assert started - started_at[0] >= (count - capacity) / rate - 0.02
+    assert started_at[-1] - started_at[0] == pytest.approx((80 - capacity) / rate, abs=0.25)
+
+
+def test_cached_rerun_is_not_rate_limited(tmp_path):
+    cache = open_response_cache(str(tmp_path / "responses"))
+    with StubCWEServer(latency=0.0, known=30) as stub:
+        analyzer = CWEHierarchyAnalyzer(base_url=stub.base_url, cache=cache, memo=PillarMemo())
+        first = analyzer.build_pillar_mapping_concurrent(1, 40, concurrency=8, rate=1000.0)
+        requested = len(stub.started_at)
+
+        # A fresh analyzer, so only the response cache (including its 404s) is shared
+        analyzer = CWEHierarchyAnalyzer(base_url=stub.base_url, cache=cache, memo=PillarMemo())
+        started = time.monotonic()
+        second = analyzer.build_pillar_mapping_concurrent(1, 40, concurrency=8, rate=2.0)
+        elapsed = time.monotonic() - started
+
+    assert second == first and len(first) == 30
+    assert len(stub.started_at) == requested
+    # At 2 requests per second, 40 uncached lookups would take about 19 seconds
+    assert elapsed < 2.0
@@ -0,0 +1,307 @@
+import argparse
+import heapq
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+from typing import Callable, Iterable, List
+
+from run_journal import RunJournal, STALE_AFTER
+
+try:
+    import chardet
+except ImportError:  # Encoding detection is optional; undecodable files fall back to latin-1
+    chardet = None
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+DEFAULT_MODEL = "Qwen/Qwen2.5-Coder-32B-Instruct"
+CHUNK_SEPARATOR = "\n\n===== CHUNK SEPARATOR =====\n\n"
+
+PROMPT = """
+You are a security specialist tasked with identifying vulnerabilities in code files. Analyse the provided file and report any Common Weakness Enumerations (CWEs) found.
+
+## Instructions:
+- For vulnerable files: List all CWE identifiers in the output section between triple backticks.
+- For secure files: Add only triple backticks with no content between them.
+- Only one output between triple backticks, no explanation after that.
+- Again, provide only the requested output format with no additional explanation.
+
+
+I am going to give you two examples for you to understand how you should proceed; however, the code can include any logic and not necessarily SQL queries.
+## Example 1: Vulnerable File
+def login():
+    username = request.form['username']
+    password = request.form['password']
+
+    # SQL Injection vulnerability
+    query = "SELECT * FROM users WHERE username = '{{}}' AND password = '{{}}'".format(username, password)
+    cursor.execute(query)
+
+    # Hard-coded credentials
+    app.secret_key = "hardcoded_secret_key_1234"
+
+Output:
+```
+CWE-89
+CWE-798
+```
+
+## Example 2: Non-Vulnerable File
+def login():
+    username = request.form.get('username', '')
+    password = request.form.get('password', '')
+
+    # Parameterized query prevents SQL injection
+    cursor.execute("SELECT * FROM users WHERE username = ?", (username,))
+
+    # Secure random key
+    app.config['SECRET_KEY'] = secrets.token_hex(32)
+
+Output:
+```
+```
+
+File to Assess:
+{file_content}
+
+Your security assessment output (CWE IDs only):
+
+"""
+
+
+def count_tokens(text: str) -> int:
+    """Approximate token count using tiktoken (gpt-4 encoding), or ~4 characters per token without it."""
+    if tiktoken is not None:
+        try:
+            return len(tiktoken.encoding_for_model("gpt-4").encode(text))
+        except Exception:
+            pass
+    return len(text) // 4
+
+
+def chunk_text(text: str, max_tokens: int = 25000) -> List[str]:
+    """Split text into chunks that respect token limits, preferring line and then word boundaries."""
+    if count_tokens(text) <= max_tokens:
+        return [text]
+
+    chunks = []
+    current_chunk = ""
+    for line in text.split("\n"):
+        if count_tokens(current_chunk + line + "\n") <= max_tokens:
+            current_chunk += line + "\n"
+        elif current_chunk:
+            chunks.append(current_chunk)
+            current_chunk = line + "\n"
+        else:
+            # Line itself is too long, need to split it
+            for word in line.split(" "):
+                if count_tokens(current_chunk + word + " ") > max_tokens:
+                    chunks.append(current_chunk)
+                    current_chunk = word + " "
+                else:
+                    current_chunk += word + " "
+            current_chunk += "\n"
+    if current_chunk:
+        chunks.append(current_chunk)
+    return chunks
+
+
+def read_source_file(path: str) -> str:
+    """Read a file with its detected encoding, using latin-1 as fallback."""
+    with open(path, 'rb') as raw_file:
+        raw_content = raw_file.read()
+    encoding = (chardet.detect(raw_content)['encoding'] if chardet is not None else None) or 'utf-8'
+    try:
+        return raw_content.decode(encoding)
+    except (UnicodeDecodeError, LookupError):
+        return raw_content.decode('latin-1')
+
+
+def together_inference(prompt: str, model: str = DEFAULT_MODEL, max_tokens: int = 512) -> str:
+    """model_inference backed by the Together API (auth from TOGETHER_API_KEY)."""
+    from together import Together
+
+    tokens = count_tokens(prompt)
+    if tokens > 32000:  # Leave some room for the model's response
+        raise ValueError(f"Prompt too long: {tokens} tokens exceed the 32000 token limit.")
+    response = Together().chat.completions.create(
+        model=model,
+        messages=[{"role": "user", "content": prompt}],
+        max_tokens=max_tokens
+    )
+    return response.choices[0].message.content
+
+
+class LLMPipeline:
+    """
+    Run model_inference over every file of every example, with the progress kept in a RunJournal.
+
+    Files already done in the journal are never sent again, so the pipeline can be
+    stopped and restarted at any time. A failing file does not stop the sweep: it is
+    handed to a background thread that retries it with exponential backoff while the
+    main loop carries on with the next file. The retry thread keeps the queued files
+    ordered by due time, so a burst of failures waits out one backoff, not one each.
+
+    Examples:
+        >>> with RunJournal("llm_run.sqlite") as journal:
+        ...     pipeline = LLMPipeline(together_inference, PROMPT, journal)
+        ...     pipeline.enqueue_examples(cve_examples)
+        ...     pipeline.run()
+    """
+
+    def __init__(self, model_inference: Callable[[str], str], prompt: str, journal: RunJournal,
+                 examples_root: str = ".", output_root: str = "LLM_output", max_attempts: int = 3,
+                 retry_delay: float = 30.0, request_delay: float = 0.0, max_chunk_tokens: int = 25000):
+        self.model_inference = model_inference
+        self.prompt = prompt
+        self.journal = journal
+        self.examples_root = examples_root
+        self.output_root = output_root
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.request_delay = request_delay
+        self.max_chunk_tokens = max_chunk_tokens
+        self.retries = queue.Queue()
+
+    def enqueue_examples(self, examples: Iterable[str]) -> int:
+        """Register the files in <examples_root>/<example>/files; returns the number of files seen."""
+        count = 0
+        for example in examples:
+            files_dir = os.path.join(self.examples_root, example, "files")
+            if not os.path.isdir(files_dir):
+                print(f"No files for {example}")
+                continue
+            for file in sorted(os.listdir(files_dir)):
+                self.journal.enqueue(example, file)
+                count += 1
+        return count
+
+    def output_path(self, example: str, file: str) -> str:
+        return os.path.join(self.output_root, example, file.replace('.py', '.txt'))
+
+    def process_file(self, example: str, file: str) -> bool:
+        """Send one file to the model (chunk by chunk) and save the output. Returns False on failure."""
+        attempt = self.journal.start(example, file)
+        try:
+            file_content = read_source_file(os.path.join(self.examples_root, example, "files", file))
+            outputs = []
+            chunks = chunk_text(file_content, self.max_chunk_tokens)
+            for chunk in chunks:
+                outputs.append(self.model_inference(self.prompt.format(file_content=chunk)))
+                if self.request_delay:
+                    # Small delay to avoid rate limits
+                    time.sleep(self.request_delay)
+            output = CHUNK_SEPARATOR.join(outputs)
+
+            output_path = self.output_path(example, file)
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            with open(output_path, 'w', encoding='utf-8') as f:
+                f.write(output)
+        except Exception as e:
+            print(f"Error with file {example}/{file} (attempt {attempt}/{self.max_attempts}): {e}")
+            self.journal.fail(example, file, str(e))
+            if attempt < self.max_attempts:
+                self.retries.put((example, file, attempt))
+            return False
+        self.journal.complete(example, file, output, output_path)
+        print(f"Processed {example}/{file} ({len(chunks)} chunks)")
+        return True
+
+    def _retry_worker(self):
+        # Heap of (due time, sequence, example, file, attempt); items stay unfinished in
+        # the queue until they are processed, so run() waits for them
+        due = []
+        sequence = itertools.count()
+        while True:
+            timeout = max(0.0, due[0][0] - time.monotonic()) if due else None
+            try:
+                item = self.retries.get(timeout=timeout)
+            except queue.Empty:
+                item = ()
+            if item is None:
+                return
+            if item:
+                example, file, attempt = item
+                due_at = time.monotonic() + self.retry_delay * 2 ** (attempt - 1)
+                heapq.heappush(due, (due_at, next(sequence), example, file, attempt))
+            while due and due[0][0] <= time.monotonic():
+                _, _, example, file, attempt = heapq.heappop(due)
+                try:
+                    self.process_file(example, file)
+                except Exception as e:
+                    # e.g. the journal failing; the file keeps its journal state for a later run
+                    print(f"Retry of {example}/{file} failed: {e}")
+                finally:
+                    self.retries.task_done()
+
+    def run(self) -> dict:
+        """
+        Process every pending file, and failed files that have attempts left.
+
+        :return: Count of files per status once the run and its retries are finished
+        """
+        retry_thread = threading.Thread(target=self._retry_worker, daemon=True)
+        retry_thread.start()
+        for example, file, _ in self.journal.pending(self.max_attempts):
+            self.process_file(example, file)
+        # Wait for the background retries (which may queue further retries) to drain
+        self.retries.join()
+        self.retries.put(None)
+        retry_thread.join()
+
+        counts = self.journal.status_counts()
+        print(f"LLM run finished: {counts}")
+        return counts
+
+
+def read_examples(filename: str) -> List[str]:
+    """Examples from a JSON list, or the keys of a JSON object such as transformed_semgrep."""
+    with open(filename, 'r') as f:
+        data = json.load(f)
+    return list(data.keys()) if isinstance(data, dict) else list(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Resumable LLM vulnerability detection over the <repo>/<commit>/files examples."
+    )
+    parser.add_argument("examples", help="JSON list of examples (e.g. 'bottle/6d7e13d') or a JSON object keyed by them.")
+    parser.add_argument("--journal", default="llm_run.sqlite", help="Run journal (SQLite) file.")
+    parser.add_argument("--examples-root", default=".", help="Folder holding the <example>/files folders.")
+    parser.add_argument("--output-root", default="LLM_output", help="Folder for the model outputs.")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="Together model name.")
+    parser.add_argument("--prompt-file", help="Prompt template with a {file_content} placeholder (default: built-in).")
+    parser.add_argument("--max-attempts", type=int, default=3, help="Attempts per file before giving up.")
+    parser.add_argument("--retry-delay", type=float, default=30.0, help="Base delay in seconds before a retry.")
+    parser.add_argument("--request-delay", type=float, default=2.0, help="Delay in seconds after each request.")
+    parser.add_argument(
+        "--stale-after", type=float, default=STALE_AFTER,
+        help="Seconds after which a file left running (by a run that died) is started over."
+    )
+    args = parser.parse_args()
+
+    prompt = PROMPT
+    if args.prompt_file:
+        with open(args.prompt_file, 'r') as f:
+            prompt = f.read()
+
+    with RunJournal(args.journal, args.stale_after) as journal:
+        pipeline = LLMPipeline(
+            lambda text: together_inference(text, args.model), prompt, journal,
+            args.examples_root, args.output_root, args.max_attempts, args.retry_delay, args.request_delay
+        )
+        pipeline.enqueue_examples(read_examples(args.examples))
+        pipeline.run()
+        unhandled = journal.unhandled_examples(args.max_attempts)
+        if unhandled:
+            print(f"Unhandled examples: {unhandled}")
+
+
+if __name__ == "__main__":
+    main()
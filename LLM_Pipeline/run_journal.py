@@ -0,0 +1,145 @@
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+# A file running for longer than this was left behind by a run that died
+STALE_AFTER = 3600.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    example TEXT NOT NULL,
+    file TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    output_path TEXT,
+    output TEXT,
+    error TEXT,
+    updated_at REAL,
+    PRIMARY KEY (example, file)
+);
+CREATE INDEX IF NOT EXISTS files_status ON files (status);
+"""
+
+
+class RunJournal:
+    """
+    Durable per-file state of an LLM sweep, stored in SQLite with write-ahead logging.
+
+    Replaces the examples_processed_by_LLM / unhandled_examples lists: every file of
+    every example has a status (pending, running, done, failed), an attempt count and
+    its output. Each update is committed immediately, so a crashed or interrupted run
+    resumes exactly where it stopped. Safe to share between threads, and several
+    processes can share one journal: a file another run is working on stays running
+    until it is `stale_after` seconds old.
+
+    Examples:
+        >>> journal = RunJournal("llm_run.sqlite")
+        >>> journal.enqueue("bottle/6d7e13d", "app.py")
+        >>> journal.start("bottle/6d7e13d", "app.py")
+        >>> journal.complete("bottle/6d7e13d", "app.py", "```\\nCWE-79\\n```", "LLM_output/bottle/6d7e13d/app.txt")
+    """
+
+    def __init__(self, path: str = "llm_run.sqlite", stale_after: float = STALE_AFTER):
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        # Files that were in flight when a previous run died start over
+        self.reset_stale(stale_after)
+
+    def _execute(self, query: str, params: tuple = ()) -> List[tuple]:
+        with self.lock:
+            rows = self.connection.execute(query, params).fetchall()
+            self.connection.commit()
+        return rows
+
+    def reset_stale(self, stale_after: float = STALE_AFTER) -> int:
+        """Put files that have been running for more than `stale_after` seconds back to pending."""
+        with self.lock:
+            cursor = self.connection.execute(
+                "UPDATE files SET status = ? WHERE status = ? AND (updated_at IS NULL OR updated_at < ?)",
+                (PENDING, RUNNING, time.time() - stale_after)
+            )
+            self.connection.commit()
+        return cursor.rowcount
+
+    def enqueue(self, example: str, file: str):
+        """Register a file; files already in the journal keep their state."""
+        self._execute(
+            "INSERT OR IGNORE INTO files (example, file, updated_at) VALUES (?, ?, ?)", (example, file, time.time())
+        )
+
+    def start(self, example: str, file: str) -> int:
+        """Mark a file as running and return its attempt number."""
+        with self.lock:
+            self.connection.execute(
+                "UPDATE files SET status = ?, attempts = attempts + 1, updated_at = ? WHERE example = ? AND file = ?",
+                (RUNNING, time.time(), example, file)
+            )
+            row = self.connection.execute(
+                "SELECT attempts FROM files WHERE example = ? AND file = ?", (example, file)
+            ).fetchone()
+            self.connection.commit()
+        return row[0] if row else 0
+
+    def complete(self, example: str, file: str, output: str, output_path: Optional[str] = None):
+        self._execute(
+            "UPDATE files SET status = ?, output = ?, output_path = ?, error = NULL, updated_at = ? "
+            "WHERE example = ? AND file = ?",
+            (DONE, output, output_path, time.time(), example, file)
+        )
+
+    def fail(self, example: str, file: str, error: str):
+        self._execute(
+            "UPDATE files SET status = ?, error = ?, updated_at = ? WHERE example = ? AND file = ?",
+            (FAILED, error, time.time(), example, file)
+        )
+
+    def pending(self, max_attempts: Optional[int] = None) -> List[Tuple[str, str, int]]:
+        """
+        List (example, file, attempts) still to do: pending files, plus failed files
+        with fewer than `max_attempts` attempts when max_attempts is given.
+        """
+        if max_attempts is None:
+            return self._execute(
+                "SELECT example, file, attempts FROM files WHERE status = ? ORDER BY example, file", (PENDING,)
+            )
+        return self._execute(
+            "SELECT example, file, attempts FROM files WHERE status = ? OR (status = ? AND attempts < ?) "
+            "ORDER BY example, file",
+            (PENDING, FAILED, max_attempts)
+        )
+
+    def status_counts(self) -> Dict[str, int]:
+        return dict(self._execute("SELECT status, COUNT(*) FROM files GROUP BY status"))
+
+    def examples_processed(self) -> List[str]:
+        """Examples whose files are all done (the old examples_processed_by_LLM list)."""
+        return [row[0] for row in self._execute(
+            "SELECT example FROM files GROUP BY example HAVING SUM(status != ?) = 0 ORDER BY example", (DONE,)
+        )]
+
+    def unhandled_examples(self, max_attempts: int) -> List[str]:
+        """Examples with a file that failed `max_attempts` times (the old unhandled_examples list)."""
+        return [row[0] for row in self._execute(
+            "SELECT DISTINCT example FROM files WHERE status = ? AND attempts >= ? ORDER BY example",
+            (FAILED, max_attempts)
+        )]
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
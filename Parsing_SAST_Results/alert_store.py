@@ -0,0 +1,206 @@
+import argparse
+import json
+import os
+import sqlite3
+from datetime import datetime, timezone
+
+import requests
+
+from fetch_github_alerts import API_URL, ALERTS_URL_TEMPLATE, build_headers, report_http_error, save_to_csv
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS alerts (
+    repo TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    state TEXT,
+    updated_at TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (repo, number)
+);
+CREATE TABLE IF NOT EXISTS validators (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    repo TEXT PRIMARY KEY,
+    watermark TEXT,
+    synced_at TEXT
+);
+"""
+
+
+class AlertStore:
+    """
+    Local SQLite copy of a repository's code scanning alerts, keyed by alert number.
+
+    sync() asks for alerts sorted by updated_at (newest first) with If-None-Match /
+    If-Modified-Since validators from the previous run, so an unchanged repository
+    costs a single 304. Otherwise pages are read until an alert older than the stored
+    watermark shows up, and only the alerts changed since then are upserted.
+
+    Examples:
+        >>> with AlertStore("alerts.sqlite") as store:
+        ...     store.sync("octocat", "Spoon-Knife", token)
+        ...     store.export_csv("octocat", "Spoon-Knife", "github_security_alerts.csv")
+    """
+
+    def __init__(self, path="alerts.sqlite"):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+
+    def _conditional_headers(self, url, headers):
+        row = self.connection.execute("SELECT etag, last_modified FROM validators WHERE url = ?", (url,)).fetchone()
+        headers = dict(headers)
+        if row and row[0]:
+            headers["If-None-Match"] = row[0]
+        if row and row[1]:
+            headers["If-Modified-Since"] = row[1]
+        return headers
+
+    def _save_validators(self, validators):
+        """Store (url, etag, last_modified) rows; only called together with the alerts they cover."""
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO validators (url, etag, last_modified) VALUES (?, ?, ?)", validators
+        )
+
+    def watermark(self, repo):
+        row = self.connection.execute("SELECT watermark FROM sync_state WHERE repo = ?", (repo,)).fetchone()
+        return row[0] if row else None
+
+    def upsert(self, repo, alerts):
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO alerts (repo, number, state, updated_at, data) VALUES (?, ?, ?, ?, ?)",
+            [(repo, alert['number'], alert.get('state'), alert.get('updated_at'), json.dumps(alert)) for alert in alerts]
+        )
+
+    def sync(self, owner, repo_name, token, session=None, api_url=API_URL):
+        """
+        Fetch the alerts changed since the last sync and upsert them.
+
+        All states are synced so that alerts fixed or dismissed since the last run are
+        updated too; filter by state when exporting.
+
+        :return: Number of alerts upserted, or None if the sync failed
+        """
+        session = session or requests.Session()
+        repo = f"{owner}/{repo_name}"
+        url = ALERTS_URL_TEMPLATE.format(api_url=api_url, owner=owner, repo=repo_name)
+        headers = build_headers(token)
+        watermark = self.watermark(repo)
+        newest = watermark
+        params = {'per_page': 100, 'sort': 'updated', 'direction': 'desc'}
+        changed = []
+        # Written with the alerts, so a failed sync cannot leave validators for pages it never stored
+        validators = []
+
+        print(f"Syncing alerts of {repo} changed since {watermark or 'the beginning'}...")
+        try:
+            while url:
+                response = session.get(url, headers=self._conditional_headers(response_url(url, params), headers),
+                                       params=params)
+                if response.status_code == 304:
+                    # This page (and, sorted by updated_at, everything after it) is unchanged
+                    print(f"Not modified: {response_url(url, params)}")
+                    break
+                response.raise_for_status()
+                data = response.json()
+                if not isinstance(data, list):
+                    print(f"Error: Unexpected API response format: {data}")
+                    return None
+                etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+                if etag or last_modified:
+                    validators.append((response_url(url, params), etag, last_modified))
+
+                fresh = [alert for alert in data if watermark is None or (alert.get('updated_at') or '') >= watermark]
+                changed.extend(fresh)
+                if fresh:
+                    newest = max(newest or '', max(alert.get('updated_at') or '' for alert in fresh))
+                if len(fresh) < len(data):
+                    # Reached alerts that were already synced
+                    break
+                url = response.links.get('next', {}).get('url')
+                params = None  # Params are included in the 'next' URL
+        except requests.exceptions.HTTPError as e:
+            report_http_error(e)
+            return None
+        except requests.exceptions.RequestException as e:
+            print(f"Network or request error fetching alerts: {e}")
+            return None
+
+        with self.connection:
+            self.upsert(repo, changed)
+            self._save_validators(validators)
+            self.connection.execute(
+                "INSERT OR REPLACE INTO sync_state (repo, watermark, synced_at) VALUES (?, ?, ?)",
+                (repo, newest, datetime.now(timezone.utc).isoformat(timespec="seconds"))
+            )
+        print(f"Upserted {len(changed)} changed alerts of {repo}")
+        return len(changed)
+
+    def alerts(self, owner, repo_name, state='open'):
+        """Stored alerts of a repository ordered by number (all states if state is None)."""
+        query = "SELECT data FROM alerts WHERE repo = ?"
+        params = [f"{owner}/{repo_name}"]
+        if state:
+            query += " AND state = ?"
+            params.append(state)
+        return [json.loads(row[0]) for row in self.connection.execute(query + " ORDER BY number", params)]
+
+    def export_csv(self, owner, repo_name, filename="github_security_alerts.csv", state='open'):
+        save_to_csv(self.alerts(owner, repo_name, state), filename)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def response_url(url, params):
+    """Cache key of a request: the URL including its query parameters."""
+    return requests.Request('GET', url, params=params).prepare().url
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Incrementally sync GitHub Code Scanning alerts into a local SQLite store and export them to CSV.",
+        epilog="Example: python alert_store.py octocat Spoon-Knife --store alerts.sqlite -o my_alerts.csv"
+    )
+    parser.add_argument("owner", help="The owner of the GitHub repository (e.g., 'octocat').")
+    parser.add_argument("repo", help="The name of the GitHub repository (e.g., 'Spoon-Knife').")
+    parser.add_argument(
+        "-t", "--token",
+        help="GitHub Personal Access Token (PAT) with 'security_events' scope. Reads from GITHUB_TOKEN environment variable if not provided."
+    )
+    parser.add_argument("--store", default="alerts.sqlite", help="SQLite alert store (default: alerts.sqlite).")
+    parser.add_argument(
+        "-o", "--output",
+        default="github_security_alerts.csv",
+        help="Output CSV file name (default: github_security_alerts.csv)."
+    )
+    parser.add_argument(
+        "--state", default="open", choices=["open", "closed", "dismissed", "fixed", "all"],
+        help="Alerts exported to the CSV (default: open)."
+    )
+    parser.add_argument(
+        "--api-url", default=API_URL,
+        help="GitHub API root (default: $GITHUB_API_URL or https://api.github.com)."
+    )
+    args = parser.parse_args()
+
+    token = args.token or os.environ.get("GITHUB_TOKEN")
+    if not token:
+        print("Error: GitHub token not provided.")
+        print("Please set the GITHUB_TOKEN environment variable or use the --token argument.")
+        exit(1)
+
+    with AlertStore(args.store) as store:
+        if store.sync(args.owner, args.repo, token, api_url=args.api_url.rstrip("/")) is None:
+            print("Failed to sync alerts. CSV file not updated.")
+            exit(1)
+        store.export_csv(args.owner, args.repo, args.output, None if args.state == "all" else args.state)
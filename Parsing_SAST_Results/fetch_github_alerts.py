@@ -2,130 +2,522 @@ import requests
 import csv
 import os
 import argparse
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
 from datetime import datetime
+from itertools import chain, islice
+from urllib.parse import urlparse, parse_qs
 
+# GitHub API root; point it at a GitHub Enterprise server or a local mock of the code-scanning API
+API_URL = os.environ.get("GITHUB_API_URL", "https://api.github.com")
 # GitHub API endpoint for code scanning alerts
-ALERTS_URL_TEMPLATE = "https://api.github.com/repos/{owner}/{repo}/code-scanning/alerts"
+ALERTS_URL_TEMPLATE = "{api_url}/repos/{owner}/{repo}/code-scanning/alerts"
 
-def fetch_alerts(owner, repo, token):
-    """Fetches all code scanning alerts for a given repository."""
-    headers = {
+def build_headers(token):
+    return {
         "Authorization": f"token {token}",
         "Accept": "application/vnd.github.v3+json",
         "X-GitHub-Api-Version": "2022-11-28" # Recommended by GitHub docs
     }
-    alerts = []
-    url = ALERTS_URL_TEMPLATE.format(owner=owner, repo=repo)
-    params = {'per_page': 100, 'state': 'open'} # Request max results per page, only open alerts initially. Can be changed.
+
+def report_http_error(e):
+    """Print the details of a failed alerts request."""
+    print(f"HTTP Error fetching alerts: {e}")
+    print(f"Response status: {e.response.status_code}")
+    print(f"Response body: {e.response.text}")
+    if e.response.status_code == 404:
+        print("Repository not found or code scanning not enabled/no alerts found.")
+    elif e.response.status_code == 401:
+         print("Authentication failed. Check your GitHub token and its permissions (needs 'security_events' scope).")
+    elif e.response.status_code == 403:
+         print("Forbidden. Check token permissions or rate limits.")
+
+class UnexpectedResponseError(ValueError):
+    """The alerts endpoint answered with something other than a list of alerts."""
+
+def report_fetch_error(e):
+    """Print why streaming or fetching alerts failed."""
+    if isinstance(e, requests.exceptions.HTTPError):
+        report_http_error(e)
+    elif isinstance(e, requests.exceptions.RequestException):
+        print(f"Network or request error fetching alerts: {e}")
+    elif isinstance(e, UnexpectedResponseError):
+        print(f"Error: {e}")
+    elif isinstance(e, IOError):
+        print(f"Error writing alerts: {e}")
+    else:
+        print(f"An unexpected error occurred during fetch: {e}")
+
+def alerts_page(response):
+    """The alerts of one page of the alerts endpoint."""
+    response.raise_for_status() # Raise HTTPError for bad responses (4xx or 5xx)
+    data = response.json()
+    if not isinstance(data, list):
+        raise UnexpectedResponseError(f"Unexpected API response format: {data}")
+    return data
+
+def iter_alert_pages(owner, repo, token, state='open', session=None, api_url=API_URL):
+    """
+    Yields the code scanning alerts of a repository one page (up to 100 alerts) at a time,
+    following the 'next' links. Errors are raised to the caller.
+    """
+    http = session or requests
+    headers = build_headers(token)
+    url = ALERTS_URL_TEMPLATE.format(api_url=api_url, owner=owner, repo=repo)
+    params = {'per_page': 100, 'state': state} # Request max results per page, only open alerts initially. Can be changed.
+    total = 0
 
     print(f"Fetching alerts from {url}...")
 
     while url:
-        try:
-            # Use params only for the first request, subsequent URLs from pagination include them
-            current_params = params if params else None
-            response = requests.get(url, headers=headers, params=current_params)
-            response.raise_for_status() # Raise HTTPError for bad responses (4xx or 5xx)
-            data = response.json()
-            if not isinstance(data, list):
-                print(f"Error: Unexpected API response format: {data}")
-                return None
+        response = http.get(url, headers=headers, params=params)
+        data = alerts_page(response)
+        total += len(data)
+        print(f"Fetched {len(data)} alerts. Total fetched: {total}")
+        yield data
+
+        # Handle pagination
+        url = response.links.get('next', {}).get('url')
+        params = None # Params are included in the 'next' URL
+
+def iter_next_pages(response, headers, session=None):
+    """Yields the alert pages after `response` by following its 'next' links."""
+    http = session or requests
+    url = response.links.get('next', {}).get('url')
+    while url:
+        response = http.get(url, headers=headers)
+        yield alerts_page(response)
+        url = response.links.get('next', {}).get('url')
+
+def fetch_alerts(owner, repo, token, state='open', session=None, api_url=API_URL):
+    """Fetches all code scanning alerts for a given repository."""
+    alerts = []
+    try:
+        for data in iter_alert_pages(owner, repo, token, state, session, api_url):
             alerts.extend(data)
-            print(f"Fetched {len(data)} alerts. Total fetched: {len(alerts)}")
+    except Exception as e:
+        report_fetch_error(e)
+        return None # Indicate failure
 
-            # Handle pagination
-            if 'next' in response.links:
-                url = response.links['next']['url']
-                params = None # Params are included in the 'next' URL
-            else:
-                url = None # No more pages
-
-        except requests.exceptions.HTTPError as e:
-            print(f"HTTP Error fetching alerts: {e}")
-            print(f"Response status: {e.response.status_code}")
-            print(f"Response body: {e.response.text}")
-            if e.response.status_code == 404:
-                print("Repository not found or code scanning not enabled/no alerts found.")
-            elif e.response.status_code == 401:
-                 print("Authentication failed. Check your GitHub token and its permissions (needs 'security_events' scope).")
-            elif e.response.status_code == 403:
-                 print("Forbidden. Check token permissions or rate limits.")
-            return None # Indicate failure
-        except requests.exceptions.RequestException as e:
-            print(f"Network or request error fetching alerts: {e}")
-            return None # Indicate failure
-        except Exception as e:
-            print(f"An unexpected error occurred during fetch: {e}")
-            return None
+    print(f"Finished fetching. Total alerts found: {len(alerts)}")
+    return alerts
+
+def last_page_number(response):
+    """Page number of the 'last' Link header of a paged response, or None if there is none."""
+    last = response.links.get('last')
+    if not last:
+        return None
+    pages = parse_qs(urlparse(last['url']).query).get('page')
+    return int(pages[0]) if pages else None
+
+def iter_alert_pages_concurrently(owner, repo, token, state='open', max_workers=8, session=None, api_url=API_URL):
+    """
+    Yields the alert pages like iter_alert_pages, but reads the number of pages from the 'last'
+    link of the first response and fetches the remaining pages concurrently (at most max_workers
+    at a time). Pages are yielded in order and at most 2 * max_workers of them are buffered, so
+    memory does not grow with the number of pages. Falls back to following 'next' links when
+    the API does not report a numbered last page.
+    """
+    if session is None:
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+    headers = build_headers(token)
+    url = ALERTS_URL_TEMPLATE.format(api_url=api_url, owner=owner, repo=repo)
+    params = {'per_page': 100, 'state': state}
+
+    def fetch_page(page):
+        return alerts_page(session.get(url, headers=headers, params={**params, 'page': page}))
+
+    print(f"Fetching alerts from {url}...")
+    response = session.get(url, headers=headers, params=params)
+    first_page = alerts_page(response)
+
+    last_page = last_page_number(response)
+    yield first_page
+    if last_page is None and 'next' in response.links:
+        print("No numbered last page in the Link header, following pages one by one.")
+        yield from iter_next_pages(response, headers, session)
+        return
+    if not last_page or last_page <= 1:
+        return
+
+    print(f"Fetching pages 2-{last_page} with {max_workers} workers...")
+    pages = iter(range(2, last_page + 1))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque(executor.submit(fetch_page, page) for page in islice(pages, 2 * max_workers))
+        try:
+            while pending:
+                data = pending.popleft().result()
+                page = next(pages, None)
+                if page is not None:
+                    pending.append(executor.submit(fetch_page, page))
+                yield data
+        finally:
+            # Stop fetching when the consumer fails or stops early
+            for future in pending:
+                future.cancel()
+
+def fetch_alerts_concurrently(owner, repo, token, state='open', max_workers=8, session=None, api_url=API_URL):
+    """
+    Fetches all code scanning alerts like fetch_alerts, but fetches the pages after the first
+    one concurrently (see iter_alert_pages_concurrently). Pages are merged in order.
+    """
+    alerts = []
+    try:
+        for data in iter_alert_pages_concurrently(owner, repo, token, state, max_workers, session, api_url):
+            alerts.extend(data)
+    except Exception as e:
+        report_fetch_error(e)
+        return None
 
     print(f"Finished fetching. Total alerts found: {len(alerts)}")
     return alerts
 
-def save_to_csv(alerts, filename="github_security_alerts.csv"):
-    """Saves the fetched alerts to a CSV file."""
+class RateLimiter:
+    """
+    Shared view of the GitHub rate-limit budget, updated from X-RateLimit-Remaining/-Reset.
+    Once fewer than `reserve` requests remain, callers wait until the window resets.
+    """
+
+    def __init__(self, reserve=50):
+        self.reserve = reserve
+        self.remaining = None
+        self.reset_at = 0
+        self.lock = threading.Lock()
+
+    def update(self, response):
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        reset = response.headers.get("X-RateLimit-Reset")
+        if remaining is None:
+            return
+        with self.lock:
+            self.remaining = int(remaining)
+            if reset:
+                self.reset_at = int(reset)
+
+    def wait(self):
+        with self.lock:
+            if self.remaining is None or self.remaining > self.reserve:
+                if self.remaining is not None:
+                    # Count requests in flight so concurrent callers do not overshoot the budget
+                    self.remaining -= 1
+                return
+            delay = self.reset_at - time.time() + 1
+        if delay > 0:
+            print(f"Rate limit budget exhausted ({self.remaining} left), waiting {delay:.0f}s for the reset...")
+            time.sleep(delay)
+        with self.lock:
+            self.remaining = None
+
+class RateLimitedSession(requests.Session):
+    """requests.Session whose requests all go through one RateLimiter."""
+
+    def __init__(self, limiter, pool_size=16):
+        super().__init__()
+        self.limiter = limiter
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.mount("http://", adapter)
+        self.mount("https://", adapter)
+
+    def request(self, method, url, *args, **kwargs):
+        self.limiter.wait()
+        response = super().request(method, url, *args, **kwargs)
+        self.limiter.update(response)
+        return response
+
+def read_repos_file(filename):
+    """
+    Reads (owner, repo) pairs from a file such as repos_metadata/repos.txt.
+    Lines are 'https://github.com/owner/repo,...' or 'owner/repo'; '#' starts a comment.
+    """
+    repositories = []
+    with open(filename, 'r') as f:
+        for line in f:
+            entry = line.split('#', 1)[0].split(',', 1)[0].strip()
+            if not entry:
+                continue
+            owner, repo = entry.rstrip('/').split('/')[-2:]
+            repositories.append((owner, repo.removesuffix('.git')))
+    return repositories
+
+# Flattened columns of an alert and the dotted path each one is read from.
+# 'repository' is only set by export_repositories and only written with include_repository.
+ALERT_COLUMNS = {
+    'repository': 'repository',
+    'number': 'number',
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+    'url': 'url',
+    'html_url': 'html_url',
+    'state': 'state',
+    'dismissed_by': 'dismissed_by.login',
+    'dismissed_at': 'dismissed_at',
+    'dismissed_reason': 'dismissed_reason',
+    'fixed_at': 'fixed_at',
+    'rule_id': 'rule.id',
+    'rule_severity': 'rule.severity',
+    'rule_description': 'rule.description',
+    'rule_name': 'rule.name',
+    'rule_tags': 'rule.tags',
+    'tool_name': 'tool.name',
+    'tool_version': 'tool.version',
+    'most_recent_instance_ref': 'most_recent_instance.ref',
+    'most_recent_instance_analysis_key': 'most_recent_instance.analysis_key',
+    'most_recent_instance_environment': 'most_recent_instance.environment',
+    'most_recent_instance_category': 'most_recent_instance.category',
+    'most_recent_instance_location_path': 'most_recent_instance.location.path',
+    'most_recent_instance_location_start_line': 'most_recent_instance.location.start_line',
+    'most_recent_instance_location_end_line': 'most_recent_instance.location.end_line',
+    'most_recent_instance_location_start_column': 'most_recent_instance.location.start_column',
+    'most_recent_instance_location_end_column': 'most_recent_instance.location.end_column',
+    'most_recent_instance_message_text': 'most_recent_instance.message.text',
+    'most_recent_instance_state': 'most_recent_instance.state',
+    'most_recent_instance_classifications': 'most_recent_instance.classifications',
+}
+# Lists written as one comma-joined value
+JOINED_COLUMNS = {'rule_tags', 'most_recent_instance_classifications'}
+# Integer columns of the Parquet schema; every other column is a string
+INTEGER_COLUMNS = {
+    'number', 'most_recent_instance_location_start_line', 'most_recent_instance_location_end_line',
+    'most_recent_instance_location_start_column', 'most_recent_instance_location_end_column',
+}
+CSV_HEADERS = [column for column in ALERT_COLUMNS if column != 'repository']
+
+def compile_alert_flattener(columns):
+    """
+    Builds a function that flattens an alert into a row: a list of the values of `columns`.
+
+    The dotted paths of the columns are merged into one tree once, so each nested object
+    (rule, most_recent_instance, its location, ...) is looked up once per alert instead of
+    once per column. Missing or null objects give None for all of their columns.
+    """
+    tree = {}
+    for index, column in enumerate(columns):
+        *parents, key = ALERT_COLUMNS[column].split('.')
+        node = tree
+        for parent in parents:
+            node = node.setdefault(parent, {})
+        node[key] = (index, column in JOINED_COLUMNS)
+
+    def plan(node):
+        # (key, column index, joined, steps of the nested object or None for a value)
+        return [(key, None, False, plan(child)) if isinstance(child, dict) else (key, *child, None)
+                for key, child in node.items()]
+
+    def extract(obj, steps, row):
+        for key, index, joined, children in steps:
+            value = obj.get(key)
+            if children is not None:
+                extract(value or {}, children, row)
+            elif joined:
+                row[index] = ','.join(value) if value else None
+            else:
+                row[index] = value
+
+    steps = plan(tree)
+    width = len(columns)
+
+    def flatten(alert):
+        row = [None] * width
+        extract(alert, steps, row)
+        return row
+
+    return flatten
+
+class AlertWriter:
+    """
+    Writes flattened alerts to a CSV file, or to a zstd-compressed Parquet file for .parquet
+    file names, as they arrive. Only a Parquet batch of rows is ever held in memory. Requires
+    pyarrow for Parquet, which is only imported when a Parquet file is written.
+
+    Examples:
+        >>> with AlertWriter("github_security_alerts.csv") as writer:
+        ...     for page in iter_alert_pages("octocat", "Spoon-Knife", token):
+        ...         writer.write_all(page)
+    """
+
+    def __init__(self, filename, include_repository=False, parquet=None, batch_size=10000):
+        self.filename = filename
+        self.columns = (['repository'] if include_repository else []) + CSV_HEADERS
+        self.flatten = compile_alert_flattener(self.columns)
+        self.parquet = filename.endswith('.parquet') if parquet is None else parquet
+        self.batch_size = batch_size
+        self.batch = []
+        self.count = 0
+        if self.parquet:
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError as e:
+                raise ImportError("Writing Parquet files requires pyarrow (pip install pyarrow)") from e
+            self.pa = pa
+            self.schema = pa.schema(
+                [(column, pa.int64() if column in INTEGER_COLUMNS else pa.string()) for column in self.columns]
+            )
+            self.writer = pq.ParquetWriter(filename, self.schema, compression='zstd')
+        else:
+            self.file = open(filename, 'w', newline='', encoding='utf-8')
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(self.columns)
+
+    def write(self, alert):
+        self.write_row(self.flatten(alert))
+
+    def write_all(self, alerts):
+        for alert in alerts:
+            self.write_row(self.flatten(alert))
+
+    def write_row(self, row):
+        self.count += 1
+        if not self.parquet:
+            self.writer.writerow(row)
+            return
+        self.batch.append(row)
+        if len(self.batch) >= self.batch_size:
+            self._flush()
+
+    def append_file(self, filename, repository):
+        """Copy the rows of a file written without the repository column, adding `repository`."""
+        if self.parquet:
+            import pyarrow.parquet as pq
+            for batch in pq.ParquetFile(filename).iter_batches(batch_size=self.batch_size):
+                for row in zip(*(column.to_pylist() for column in batch.columns)):
+                    self.write_row([repository, *row])
+            return
+        with open(filename, 'r', newline='', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            next(reader, None) # Header
+            for row in reader:
+                self.write_row([repository, *row])
+
+    def _flush(self):
+        if self.batch:
+            arrays = [self.pa.array(values, type=field.type) for values, field in zip(zip(*self.batch), self.schema)]
+            self.writer.write_batch(self.pa.RecordBatch.from_arrays(arrays, schema=self.schema))
+            self.batch = []
+
+    def close(self):
+        if self.parquet:
+            self._flush()
+            self.writer.close()
+        else:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def export_alerts(owner, repo, token, filename="github_security_alerts.csv", state='open', concurrency=8,
+                  session=None, api_url=API_URL):
+    """
+    Streams the alerts of a repository to a CSV (or .parquet) file page by page as they are
+    fetched, so memory use does not grow with the number of alerts. The file is written under
+    a temporary name and renamed into place once every page arrived; like save_to_csv, no file
+    is written when there are no alerts.
+
+    :param concurrency: Pages fetched at once after the first one; 1 follows the pages one by one
+    :return: Number of alerts written, or None if fetching or writing failed
+    """
+    if concurrency > 1:
+        pages = iter_alert_pages_concurrently(owner, repo, token, state, concurrency, session, api_url)
+    else:
+        pages = iter_alert_pages(owner, repo, token, state, session, api_url)
+    temp_filename = f"{filename}.partial"
+    writer = None
+    try:
+        with closing(pages):
+            for data in pages:
+                if writer is None and data:
+                    print(f"Streaming alerts to {filename}...")
+                    writer = AlertWriter(temp_filename, parquet=filename.endswith('.parquet'))
+                if data:
+                    writer.write_all(data)
+        if writer is not None:
+            writer.close()
+    except Exception as e:
+        report_fetch_error(e)
+        if writer is not None:
+            writer.close()
+            os.unlink(temp_filename)
+        return None
+
+    if writer is None:
+        print("No alerts found or fetched to save.")
+        return 0
+    os.replace(temp_filename, filename)
+    print(f"Successfully saved {writer.count} alerts to {filename}")
+    return writer.count
+
+def export_repositories(repositories, token, output_dir="github_alerts", combined_filename=None, state='open',
+                        max_repos=4, page_concurrency=4, reserve=50, api_url=API_URL):
+    """
+    Exports the alerts of many repositories: one CSV per repository plus an optional combined CSV.
+
+    Up to max_repos repositories are fetched at once (each with page_concurrency page workers),
+    all on one HTTP session whose requests are paced by a shared RateLimiter. Alerts are streamed
+    to the per-repository files, which are then concatenated into the combined file, so no
+    repository's alerts are held in memory. With a .parquet combined file every file is Parquet.
+
+    :return: Dictionary of 'owner/repo' -> number of alerts, or None where fetching failed
+    """
+    session = RateLimitedSession(RateLimiter(reserve), pool_size=max_repos * page_concurrency)
+    os.makedirs(output_dir, exist_ok=True)
+    extension = '.parquet' if combined_filename and combined_filename.endswith('.parquet') else '.csv'
+
+    def output_path(repository):
+        owner, repo = repository
+        return os.path.join(output_dir, f"{owner}__{repo}{extension}")
+
+    def export(repository):
+        owner, repo = repository
+        return export_alerts(owner, repo, token, output_path(repository), state, page_concurrency, session, api_url)
+
+    with ThreadPoolExecutor(max_workers=max_repos) as executor:
+        counts = list(executor.map(export, repositories))
+    results = {f"{owner}/{repo}": count for (owner, repo), count in zip(repositories, counts)}
+    total = sum(count for count in counts if count)
+
+    if combined_filename and not total:
+        print("No alerts found or fetched to save.")
+    elif combined_filename:
+        print(f"Saving alerts to {combined_filename}...")
+        with AlertWriter(combined_filename, include_repository=True) as writer:
+            for (owner, repo), count in zip(repositories, counts):
+                if count:
+                    writer.append_file(output_path((owner, repo)), f"{owner}/{repo}")
+        print(f"Successfully saved {writer.count} alerts to {combined_filename}")
+    failed = [repository for repository, count in results.items() if count is None]
+    print(f"Exported alerts of {len(results) - len(failed)}/{len(results)} repositories "
+          f"({total} alerts)" + (f"; failed: {', '.join(failed)}" if failed else ""))
+    return results
+
+def save_to_csv(alerts, filename="github_security_alerts.csv", include_repository=False):
+    """
+    Saves alerts to a CSV file (Parquet for a .parquet file name); include_repository adds the
+    'repository' set by export_repositories. Alerts may be a list or any iterable, e.g. a generator
+    over iter_alert_pages, and are written one row at a time as they arrive.
+    """
     if alerts is None:
         print("Alert fetching failed. Cannot save to CSV.")
         return
-    if not alerts:
+    alerts = iter(alerts)
+    first = next(alerts, None)
+    if first is None:
         print("No alerts found or fetched to save.")
         return
 
-    # Define the headers based on potential fields in the alert object
-    # Adjust these based on the actual data you need
-    headers = [
-        'number', 'created_at', 'updated_at', 'url', 'html_url',
-        'state', 'dismissed_by', 'dismissed_at', 'dismissed_reason', 'fixed_at',
-        'rule_id', 'rule_severity', 'rule_description', 'rule_name', 'rule_tags',
-        'tool_name', 'tool_version', 'most_recent_instance_ref', 'most_recent_instance_analysis_key',
-        'most_recent_instance_environment', 'most_recent_instance_category',
-        'most_recent_instance_location_path',
-        'most_recent_instance_location_start_line', 'most_recent_instance_location_end_line',
-        'most_recent_instance_location_start_column', 'most_recent_instance_location_end_column',
-        'most_recent_instance_message_text', 'most_recent_instance_state',
-        'most_recent_instance_classifications'
-    ]
-
     print(f"Saving alerts to {filename}...")
     try:
-        with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=headers, extrasaction='ignore') # Ignore extra fields from API
-            writer.writeheader()
-
-            for alert in alerts:
-                # Flatten the nested structure for CSV
-                row = {
-                    'number': alert.get('number'),
-                    'created_at': alert.get('created_at'),
-                    'updated_at': alert.get('updated_at'),
-                    'url': alert.get('url'),
-                    'html_url': alert.get('html_url'),
-                    'state': alert.get('state'),
-                    'dismissed_by': alert.get('dismissed_by', {}).get('login') if alert.get('dismissed_by') else None,
-                    'dismissed_at': alert.get('dismissed_at'),
-                    'dismissed_reason': alert.get('dismissed_reason'),
-                    'fixed_at': alert.get('fixed_at'),
-                    'rule_id': alert.get('rule', {}).get('id'),
-                    'rule_severity': alert.get('rule', {}).get('severity'),
-                    'rule_description': alert.get('rule', {}).get('description'),
-                    'rule_name': alert.get('rule', {}).get('name'),
-                    'rule_tags': ','.join(alert.get('rule', {}).get('tags', [])) if alert.get('rule', {}).get('tags') else None,
-                    'tool_name': alert.get('tool', {}).get('name'),
-                    'tool_version': alert.get('tool', {}).get('version'),
-                    'most_recent_instance_ref': alert.get('most_recent_instance', {}).get('ref'),
-                    'most_recent_instance_analysis_key': alert.get('most_recent_instance', {}).get('analysis_key'),
-                    'most_recent_instance_environment': alert.get('most_recent_instance', {}).get('environment'),
-                    'most_recent_instance_category': alert.get('most_recent_instance', {}).get('category'),
-                    'most_recent_instance_location_path': alert.get('most_recent_instance', {}).get('location', {}).get('path'),
-                    'most_recent_instance_location_start_line': alert.get('most_recent_instance', {}).get('location', {}).get('start_line'),
-                    'most_recent_instance_location_end_line': alert.get('most_recent_instance', {}).get('location', {}).get('end_line'),
-                    'most_recent_instance_location_start_column': alert.get('most_recent_instance', {}).get('location', {}).get('start_column'),
-                    'most_recent_instance_location_end_column': alert.get('most_recent_instance', {}).get('location', {}).get('end_column'),
-                    'most_recent_instance_message_text': alert.get('most_recent_instance', {}).get('message', {}).get('text'),
-                    'most_recent_instance_state': alert.get('most_recent_instance', {}).get('state'),
-                    'most_recent_instance_classifications': ','.join(alert.get('most_recent_instance', {}).get('classifications', [])) if alert.get('most_recent_instance', {}).get('classifications') else None
-                }
-                writer.writerow(row)
-        print(f"Successfully saved {len(alerts)} alerts to {filename}")
+        with AlertWriter(filename, include_repository) as writer:
+            writer.write_all(chain([first], alerts))
+        print(f"Successfully saved {writer.count} alerts to {filename}")
     except IOError as e:
         print(f"Error writing to CSV file {filename}: {e}")
     except Exception as e:
@@ -137,8 +529,19 @@ if __name__ == "__main__":
         description="Fetch GitHub Code Scanning alerts for a repository and save to CSV.",
         epilog="Example: python fetch_github_alerts.py octocat Spoon-Knife -o my_alerts.csv"
     )
-    parser.add_argument("owner", help="The owner of the GitHub repository (e.g., 'octocat').")
-    parser.add_argument("repo", help="The name of the GitHub repository (e.g., 'Spoon-Knife').")
+    parser.add_argument("owner", nargs="?", help="The owner of the GitHub repository (e.g., 'octocat').")
+    parser.add_argument("repo", nargs="?", help="The name of the GitHub repository (e.g., 'Spoon-Knife').")
+    parser.add_argument(
+        "--repos-file",
+        help="Export every repository listed in this file (e.g. repos_metadata/repos.txt) instead of one owner/repo. "
+             "Writes one CSV per repository to --output-dir and all alerts to --output."
+    )
+    parser.add_argument("--output-dir", default="github_alerts", help="Folder for the per-repository CSVs.")
+    parser.add_argument("--max-repos", type=int, default=4, help="Repositories fetched at once with --repos-file.")
+    parser.add_argument(
+        "--rate-limit-reserve", type=int, default=50,
+        help="Pause until the rate limit resets when fewer requests than this remain (default: 50)."
+    )
     parser.add_argument(
         "-t", "--token",
         help="GitHub Personal Access Token (PAT) with 'security_events' scope. Reads from GITHUB_TOKEN environment variable if not provided."
@@ -146,9 +549,20 @@ if __name__ == "__main__":
     parser.add_argument(
         "-o", "--output",
         default="github_security_alerts.csv",
-        help="Output CSV file name (default: github_security_alerts.csv)."
+        help="Output CSV file name (default: github_security_alerts.csv). A .parquet name writes Parquet (requires pyarrow)."
+    )
+    parser.add_argument(
+        "--state", default="open", choices=["open", "closed", "dismissed", "fixed"],
+        help="Only fetch alerts in this state (default: open)."
+    )
+    parser.add_argument(
+        "-c", "--concurrency", type=int, default=8,
+        help="Pages fetched at once after the first one (default: 8). Use 1 to follow pages one by one."
+    )
+    parser.add_argument(
+        "--api-url", default=API_URL,
+        help="GitHub API root (default: $GITHUB_API_URL or https://api.github.com)."
     )
-    # Optional: Add arguments to filter alerts by state (e.g., open, fixed, dismissed) if needed
 
     args = parser.parse_args()
 
@@ -160,16 +574,21 @@ if __name__ == "__main__":
         print("The token requires the 'security_events' scope.")
         exit(1)
 
+    if args.repos_file:
+        results = export_repositories(
+            read_repos_file(args.repos_file), token, args.output_dir, args.output, args.state,
+            args.max_repos, args.concurrency, args.rate_limit_reserve, args.api_url.rstrip("/")
+        )
+        print("Script finished.")
+        exit(0 if any(count is not None for count in results.values()) else 1)
+
     if not args.owner or not args.repo:
          print("Error: Repository owner and name are required.")
          parser.print_help()
          exit(1)
 
-    alerts_data = fetch_alerts(args.owner, args.repo, token)
-
-    if alerts_data is not None:
-        save_to_csv(alerts_data, args.output)
-    else:
+    if export_alerts(args.owner, args.repo, token, args.output, args.state, args.concurrency,
+                     api_url=args.api_url.rstrip("/")) is None:
         print("Failed to fetch or process alerts. CSV file not created.")
         exit(1)
 
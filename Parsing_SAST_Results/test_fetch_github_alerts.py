@@ -0,0 +1,116 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from fetch_github_alerts import iter_alert_pages_concurrently
+
+PER_PAGE = 100
+
+
+class StubCodeScanningServer:
+    """
+    Local stand-in for the code scanning alerts endpoint: `pages` pages of alerts numbered from 1,
+    each answered after a random delay of up to `latency` seconds. With `numbered_last`, responses
+    carry a 'last' link with a page number; otherwise only 'next' links to opaque cursors.
+    """
+
+    def __init__(self, pages: int, latency: float = 0.0, numbered_last: bool = True):
+        self.pages = pages
+        self.latency = latency
+        self.numbered_last = numbered_last
+        self.lock = threading.Lock()
+        self.requested = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query)
+                if "cursor" in query:
+                    page = int(query["cursor"][0], 16)
+                else:
+                    page = int(query.get("page", ["1"])[0])
+                with stub.lock:
+                    stub.requested.append(page)
+                time.sleep(random.uniform(0, stub.latency))
+                first = (page - 1) * PER_PAGE + 1
+                body = json.dumps([{"number": number} for number in range(first, first + PER_PAGE)]).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                links = []
+                if page < stub.pages:
+                    if stub.numbered_last:
+                        links.append(f'<{stub.alerts_url}?per_page={PER_PAGE}&page={page + 1}>; rel="next"')
+                        links.append(f'<{stub.alerts_url}?per_page={PER_PAGE}&page={stub.pages}>; rel="last"')
+                    else:
+                        links.append(f'<{stub.alerts_url}?per_page={PER_PAGE}&cursor={page + 1:x}>; rel="next"')
+                if links:
+                    self.send_header("Link", ", ".join(links))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def api_url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    @property
+    def alerts_url(self) -> str:
+        return f"{self.api_url}/repos/octocat/Spoon-Knife/code-scanning/alerts"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def alert_numbers(pages):
+    return [alert["number"] for page in pages for alert in page]
+
+
+def test_pages_are_merged_in_order_across_last():
+    with StubCodeScanningServer(pages=12, latency=0.05) as stub:
+        pages = list(iter_alert_pages_concurrently(
+            "octocat", "Spoon-Knife", "token", max_workers=4, api_url=stub.api_url
+        ))
+
+    assert alert_numbers(pages) == list(range(1, 12 * PER_PAGE + 1))
+    assert sorted(stub.requested) == list(range(1, 13))
+
+
+def test_follows_next_links_without_numbered_last():
+    with StubCodeScanningServer(pages=3, numbered_last=False) as stub:
+        pages = list(iter_alert_pages_concurrently(
+            "octocat", "Spoon-Knife", "token", max_workers=4, api_url=stub.api_url
+        ))
+
+    assert alert_numbers(pages) == list(range(1, 3 * PER_PAGE + 1))
+    # The first page is not requested again when falling back to the 'next' links
+    assert stub.requested == [1, 2, 3]
+
+
+def test_closing_early_stops_fetching():
+    max_workers = 2
+    with StubCodeScanningServer(pages=50, latency=0.02) as stub:
+        pages = iter_alert_pages_concurrently(
+            "octocat", "Spoon-Knife", "token", max_workers=max_workers, api_url=stub.api_url
+        )
+        assert alert_numbers([next(pages), next(pages)]) == list(range(1, 2 * PER_PAGE + 1))
+        pages.close()
+        requested = len(stub.requested)
+        time.sleep(0.2)
+
+    # First page, the buffered window and the pages queued while consuming; never all 50
+    assert requested <= 1 + 2 * max_workers + 2
+    assert len(stub.requested) == requested
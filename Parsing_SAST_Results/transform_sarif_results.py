@@ -0,0 +1,298 @@
+import argparse
+import json
+import os
+import sys
+from urllib.parse import unquote, urlparse
+
+from transform_codeql_alerts import SEVERITY_TO_IMPACT, SEVERITY_TO_SEVERITY, extract_cwe, save_transformed_data
+
+try:
+    import ijson
+except ImportError:  # Optional: without ijson the whole SARIF file is loaded with json
+    ijson = None
+
+# --- Configuration ---
+OUTPUT_FILE = "sarif_transformed_results.json"
+# ---------------------
+
+# --- Mappings ---
+# Map SARIF levels and tool-specific severities to the GitHub severities of transform_codeql_alerts
+LEVEL_TO_SEVERITY = {
+    "error": "error",
+    "warning": "warning",
+    "note": "note",
+    "none": "note",
+    "recommendation": "note",  # CodeQL problem.severity
+}
+# Result/rule properties that may hold a CWE (a number, 'CWE-79', a list, or {"id": ...})
+CWE_PROPERTY_KEYS = ("cwe", "cwes", "cwe_id", "issue_cwe")
+# ----------------
+
+# Values of the SARIF document built incrementally: the tool (with its rules), base URIs and results of each run
+TOOL_PREFIX = "runs.item.tool"
+BASE_URIS_PREFIX = "runs.item.originalUriBaseIds"
+RESULT_PREFIX = "runs.item.results.item"
+
+
+def iter_sarif_values(f):
+    """
+    Yields (run index, prefix, value) for the tool, originalUriBaseIds and every result of every run.
+
+    With ijson each value is built from the parser's events on its own, so only one result is
+    in memory at a time however large the file is; without it the file is loaded with json.
+    """
+    if ijson is None:
+        for run_index, run in enumerate(json.load(f).get("runs", [])):
+            if "tool" in run:
+                yield run_index, TOOL_PREFIX, run["tool"]
+            if "originalUriBaseIds" in run:
+                yield run_index, BASE_URIS_PREFIX, run["originalUriBaseIds"]
+            for result in run.get("results") or []:
+                yield run_index, RESULT_PREFIX, result
+        return
+
+    prefixes = {TOOL_PREFIX, BASE_URIS_PREFIX, RESULT_PREFIX}
+    run_index = -1
+    builder = None
+    for prefix, event, value in ijson.parse(f, use_float=True):
+        if builder is None:
+            if prefix == "runs.item" and event == "start_map":
+                run_index += 1
+            if prefix not in prefixes or event not in ("start_map", "start_array"):
+                continue
+            builder, target, depth = ijson.ObjectBuilder(), prefix, 0
+        builder.event(event, value)
+        if event in ("start_map", "start_array"):
+            depth += 1
+        elif event in ("end_map", "end_array"):
+            depth -= 1
+            if depth == 0:
+                yield run_index, target, builder.value
+                builder = None
+
+
+class RuleIndex:
+    """Rules of one run, from the driver and its extensions (CodeQL query packs), by id and by position."""
+
+    def __init__(self, tool):
+        tool = tool or {}
+        self.driver = (tool.get("driver") or {}).get("rules") or []
+        self.extensions = [extension.get("rules") or [] for extension in tool.get("extensions") or []]
+        self.by_id = {}
+        for rules in [self.driver, *self.extensions]:
+            for rule in rules:
+                self.by_id.setdefault(rule.get("id"), rule)
+
+    def resolve(self, result):
+        """The rule a result refers to (by ruleId, rule.id, or rule/ruleIndex position), or an empty dict."""
+        reference = result.get("rule") or {}
+        rule_id = result.get("ruleId") or reference.get("id")
+        if rule_id in self.by_id:
+            return self.by_id[rule_id]
+        index = reference.get("index", result.get("ruleIndex"))
+        component = (reference.get("toolComponent") or {}).get("index")
+        rules = self.driver if component is None else (
+            self.extensions[component] if component < len(self.extensions) else []
+        )
+        if index is not None and 0 <= index < len(rules):
+            return rules[index]
+        return {}
+
+
+def cwes_from_property(value):
+    """CWE identifiers of a property value: 79, 'CWE-79', ['CWE-79', ...] or {'id': 79}."""
+    if isinstance(value, dict):
+        value = value.get("id")
+    if isinstance(value, list):
+        return [cwe for item in value for cwe in cwes_from_property(item)]
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    text = str(value).strip() if value is not None else ""
+    if text.isdigit():
+        return [f"CWE-{text}"]
+    return extract_cwe(text)
+
+
+def extract_result_cwes(result, rule, rule_cwes=None):
+    """
+    CWEs of a result: the rule's tags (CodeQL, Bandit: 'external/cwe/cwe-089'), CWE properties,
+    relationships to the CWE taxonomy, and finally the optional rule id -> CWEs mapping (Pysa).
+    """
+    cwes = []
+    for properties in (rule.get("properties") or {}, result.get("properties") or {}):
+        cwes += extract_cwe(",".join(str(tag) for tag in properties.get("tags") or []))
+        for key in CWE_PROPERTY_KEYS:
+            if key in properties:
+                cwes += cwes_from_property(properties[key])
+    for relationship in rule.get("relationships") or []:
+        target = relationship.get("target") or {}
+        if ((target.get("toolComponent") or {}).get("name") or "").upper() == "CWE":
+            cwes += cwes_from_property(target.get("id"))
+    if rule_cwes:
+        cwes += rule_cwes.get(result.get("ruleId") or rule.get("id"), [])
+    # Keep the first occurrence of each CWE
+    return list(dict.fromkeys(cwes))
+
+
+def sarif_severity(result, rule):
+    """
+    GitHub rule severity (error, warning, note) of a result, from CodeQL's problem.severity or the SARIF level.
+
+    This is what the code scanning API reports as rule.severity (the rule_severity column that
+    transform_codeql_alerts maps), so local scans and API-sourced alerts get the same impact.
+    The security-severity score is not used, since the API path does not use it either.
+    """
+    properties = {**(rule.get("properties") or {}), **(result.get("properties") or {})}
+    level = (properties.get("problem.severity") or result.get("level")
+             or (rule.get("defaultConfiguration") or {}).get("level") or "warning")
+    return LEVEL_TO_SEVERITY.get(str(level).lower(), "note")
+
+
+def artifact_path(result, base_uris):
+    """Path of a result's first location, resolved against the run's originalUriBaseIds."""
+    locations = result.get("locations") or []
+    if not locations:
+        return None
+    artifact = (locations[0].get("physicalLocation") or {}).get("artifactLocation") or {}
+    uri = artifact.get("uri")
+    if not uri:
+        return None
+    base = ((base_uris or {}).get(artifact.get("uriBaseId")) or {}).get("uri")
+    if base and not urlparse(uri).scheme:
+        uri = base.rstrip("/") + "/" + uri
+    if urlparse(uri).scheme == "file":
+        uri = urlparse(uri).path
+    return unquote(uri)
+
+
+def split_data_path(path):
+    """
+    'data/repo_name/commit_hash/files/actual_path.py' (possibly below an absolute scan root) ->
+    ('repo_name/commit_hash', 'repo_name/commit_hash/files/actual_path.py'), or None for other paths.
+    """
+    parts = path.replace('\\', '/').split('/')
+    for start in range(len(parts) - 3):
+        if parts[start] == 'data' and parts[start + 3] == 'files':
+            repo_name, commit_hash = parts[start + 1], parts[start + 2]
+            return f"{repo_name}/{commit_hash}", f"{repo_name}/{commit_hash}/{'/'.join(parts[start + 3:])}"
+    return None
+
+
+def transform_sarif_files(input_files, rule_cwes=None, transformed_output=None):
+    """
+    Transforms the results of SARIF 2.1.0 files (CodeQL, Pysa, Bandit, ...) into the
+    detected_files_meta_data format of transform_codeql_alerts, without the GitHub API and CSV steps.
+    """
+    transformed_output = {} if transformed_output is None else transformed_output
+    counts = {"processed": 0, "skipped_path": 0, "skipped_cwe": 0}
+
+    def add_result(result, rule_index, base_uris):
+        rule = rule_index.resolve(result)
+        path = artifact_path(result, base_uris)
+        keys = split_data_path(path) if path else None
+        if not keys:
+            counts["skipped_path"] += 1
+            return
+        cwes = extract_result_cwes(result, rule, rule_cwes)
+        if not cwes:
+            counts["skipped_cwe"] += 1
+            return
+        repo_commit_key, output_file_path = keys
+        severity = sarif_severity(result, rule)
+        if repo_commit_key not in transformed_output:
+            transformed_output[repo_commit_key] = {
+                "detected_files_meta_data": []
+            }
+        transformed_output[repo_commit_key]["detected_files_meta_data"].append({
+            "file_path": output_file_path,
+            "impact": SEVERITY_TO_IMPACT.get(severity, "LOW"),
+            "likelihood": "LOW",  # Fixed as per example
+            "severity": SEVERITY_TO_SEVERITY.get(severity, "WARNING"),
+            "cwes": cwes
+        })
+        counts["processed"] += 1
+
+    for input_file in input_files:
+        print(f"Transforming SARIF results of {input_file}...")
+        rules, base_uris, waiting = {}, {}, {}
+        with open(input_file, 'rb') as f:
+            for run_index, prefix, value in iter_sarif_values(f):
+                if prefix == TOOL_PREFIX:
+                    rules[run_index] = RuleIndex(value)
+                    for result in waiting.pop(run_index, []):
+                        add_result(result, rules[run_index], base_uris.get(run_index))
+                elif prefix == BASE_URIS_PREFIX:
+                    base_uris[run_index] = value
+                elif run_index in rules:
+                    add_result(value, rules[run_index], base_uris.get(run_index))
+                else:
+                    # SARIF does not require the tool to come first; hold the run's results until it does
+                    waiting.setdefault(run_index, []).append(value)
+        # Runs without a tool have no rules to resolve
+        for run_index, results in waiting.items():
+            for result in results:
+                add_result(result, RuleIndex(None), base_uris.get(run_index))
+
+    print(f"Transformation complete.")
+    print(f"  Processed {counts['processed']} results into {len(transformed_output)} repo/commit entries.")
+    if counts["skipped_path"] > 0:
+        print(f"  Skipped {counts['skipped_path']} results due to missing or unexpected file paths.")
+    if counts["skipped_cwe"] > 0:
+        print(f"  Skipped {counts['skipped_cwe']} results due to missing CWEs.")
+    return transformed_output
+
+
+def find_sarif_files(paths):
+    """Expands directories to the .sarif/.sarif.json files below them."""
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for directory, _, files in sorted(os.walk(path)):
+            for name in sorted(files):
+                if name.endswith((".sarif", ".sarif.json")):
+                    yield os.path.join(directory, name)
+
+
+def load_rule_cwes(filename):
+    """Loads a JSON mapping of rule id -> CWE ids for tools whose SARIF carries no CWEs (e.g. Pysa)."""
+    with open(filename, 'r', encoding='utf-8') as f:
+        mapping = json.load(f)
+    return {rule_id: [cwe for value in (cwes if isinstance(cwes, list) else [cwes]) for cwe in cwes_from_property(value)]
+            for rule_id, cwes in mapping.items()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Transform SARIF 2.1.0 results (CodeQL, Pysa, Bandit, ...) of scans of the data/ folder "
+                    "into the detected_files_meta_data JSON format.",
+        epilog="Example: python transform_sarif_results.py codeql.sarif bandit.sarif -o sarif_transformed_results.json"
+    )
+    parser.add_argument("inputs", nargs="+", help="SARIF files, or folders searched for *.sarif files.")
+    parser.add_argument("-o", "--output", default=OUTPUT_FILE, help=f"Output JSON file (default: {OUTPUT_FILE}).")
+    parser.add_argument(
+        "--rule-cwes",
+        help="JSON file mapping rule ids to CWEs, for tools whose rules carry no CWE (e.g. {\"5001\": [\"CWE-89\"]})."
+    )
+    args = parser.parse_args()
+
+    if ijson is None:
+        print("ijson is not installed; SARIF files are loaded into memory (pip install ijson to stream them).")
+    input_files = list(find_sarif_files(args.inputs))
+    if not input_files:
+        print("Error: No SARIF files found.")
+        sys.exit(1)
+    try:
+        transformed_result = transform_sarif_files(
+            input_files, load_rule_cwes(args.rule_cwes) if args.rule_cwes else None
+        )
+    except FileNotFoundError as e:
+        print(f"Error: Input file not found: {e.filename}")
+        sys.exit(1)
+    except (ValueError, IOError) as e:
+        print(f"Error reading SARIF results: {e}")
+        sys.exit(1)
+    if transformed_result:
+        save_transformed_data(transformed_result, args.output)
+    else:
+        print("Transformation resulted in empty data. No output file saved.")